@@ -0,0 +1,292 @@
+import argparse, time, statistics
+
+import helpers.drivers as drivers
+
+
+
+# ---------------------------
+# Driver startup
+# ---------------------------
+def bench_startup(runs: int = 3):
+    """Time driver launches with binary resolution on every start vs the resolved-binary cache."""
+    launchers = {
+        "headless": drivers.headless_driver,
+        "undetected": lambda: drivers.undetected_driver(headless=True),
+    }
+    print(f"🧪 Chrome major version: {drivers.chrome_major_version()}")
+
+    results = {}
+    for mode, use_cache in (("resolve", False), ("cached", True)):
+        drivers.USE_DRIVER_CACHE = use_cache
+        if use_cache:
+            # warm the cache once so the timed runs measure cache hits only
+            drivers.chromedriver_path()
+            drivers.uc_driver_path()
+        for kind, launch in launchers.items():
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                driver = launch()
+                timings.append(time.perf_counter() - start)
+                driver.quit()
+            results[(kind, mode)] = statistics.median(timings)
+
+    print("\n=== Driver startup (median of %d) ===" % runs)
+    for kind in launchers:
+        resolve, cached = results[(kind, "resolve")], results[(kind, "cached")]
+        print(f"{kind:<11} resolve: {resolve:6.2f}s   cached: {cached:6.2f}s   saved: {resolve - cached:6.2f}s/launch")
+
+
+# ---------------------------
+# Navigation latency
+# ---------------------------
+def bench_navigation(listing_urls: list, runs: int = 3):
+    """
+    Time driver.get() + readiness wait per marketplace with the "normal" and "eager"
+    page-load strategies, on each homepage and on any listing URLs given.
+    """
+    from constants import MARKETPLACES
+    from helpers.parsing import detect_marketplace
+    from helpers.utils import navigate
+    from helpers.stats import run_stats, reset_run_stats
+    import marketplaces.vinted, marketplaces.wallapop, marketplaces.milanuncios  # register CONFIGs
+
+    targets = []  # (marketplace, stage, url, ready)
+    for name, data in MARKETPLACES.items():
+        targets.append((name, "home", data["config"]["home_url"], None))
+    for url in listing_urls:
+        name = detect_marketplace(url)
+        if name:
+            targets.append((name, "listing", url, MARKETPLACES[name]["config"].get("ready_listing")))
+
+    results = {}
+    for strategy in ("normal", "eager"):
+        drivers.PAGE_LOAD_STRATEGY = strategy
+        for name, stage, url, ready in targets:
+            launch = (lambda: drivers.undetected_driver(headless=True)) if name == "milanuncios" else drivers.headless_driver
+            driver = launch()
+            try:
+                reset_run_stats()
+                for _ in range(runs):
+                    navigate(driver, url, ready, name, stage)
+                    driver.get("about:blank")
+                results[(name, stage, strategy)] = statistics.median(s["seconds"] for s in run_stats("nav"))
+            finally:
+                driver.quit()
+
+    print("\n=== Navigation latency until ready (median of %d) ===" % runs)
+    for name, stage, url, _ in targets:
+        normal, eager = results[(name, stage, "normal")], results[(name, stage, "eager")]
+        print(f"{name.capitalize():<12} {stage:<8} normal: {normal:6.2f}s   eager: {eager:6.2f}s   saved: {normal - eager:6.2f}s")
+
+
+# ---------------------------
+# HTML parsers
+# ---------------------------
+def bench_parsers(files: list, runs: int = 5):
+    """
+    Parse saved pages with every installed backend and run the marketplaces' col_* lookups
+    on them. Reports median time, Python heap peak and (with psutil) resident memory growth.
+    """
+    import os, gc, tracemalloc
+    from constants import SCRIPT_DIR, MARKETPLACES
+    from helpers.parsers import available_parsers, parse_page, find_all
+    import marketplaces.vinted, marketplaces.wallapop, marketplaces.milanuncios  # register CONFIGs
+    try:
+        import psutil
+        process = psutil.Process()
+    except ImportError:
+        process = None
+
+    files = files or [os.path.join(SCRIPT_DIR, "error_page_source.html")]
+    specs = [
+        config[key] for config in (m["config"] for m in MARKETPLACES.values())
+        for key in ("col_title", "col_price", "col_description", "col_image_http") if config.get(key)
+    ]
+
+    print(f"\n=== HTML parsers (median of {runs}) ===")
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        print(f"{os.path.basename(path)} ({len(html) / 1024:.0f} KB)")
+        for name in available_parsers():
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                page = parse_page(html, name)
+                for spec in specs:
+                    find_all(page, spec)
+                timings.append(time.perf_counter() - start)
+                del page
+
+            gc.collect()
+            rss_before = process.memory_info().rss if process else None
+            tracemalloc.start()
+            page = parse_page(html, name)
+            _, heap_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rss = f"{(process.memory_info().rss - rss_before) / 1024:>8.0f} KB RSS" if process else "    (no psutil)"
+            del page
+
+            print(f"   {name:<11} {statistics.median(timings) * 1000:8.1f} ms   {heap_peak / 1024:>8.0f} KB Python heap   {rss}")
+
+
+# ---------------------------
+# Recorded pages (offline)
+# ---------------------------
+def record_fixtures(urls: list, kind: str = "listing", use_driver: bool = False):
+    """
+    Save live pages as fixtures (helpers/replay.py): the raw HTTP body, or with use_driver the
+    DOM of the rendered page (profiles are scrolled to the end first, like a real check).
+    """
+    from constants import MARKETPLACES
+    from helpers import http_session
+    from helpers.replay import save_fixture, marketplace_of
+    from helpers.utils import navigate, scroll_to_load_all_items
+    import marketplaces.vinted, marketplaces.wallapop, marketplaces.milanuncios  # register CONFIGs
+
+    for url in urls:
+        name = marketplace_of(url)
+        if not name:
+            print(f"❌ Could not detect marketplace, skipped: {url}")
+            continue
+        config = MARKETPLACES[name]["config"]
+        if not use_driver:
+            r = http_session.get(url)
+            if r.status_code != 200:
+                print(f"❌ {url}: HTTP {r.status_code}")
+                continue
+            save_fixture(url, r.text, kind, "http")
+            continue
+
+        driver = drivers.undetected_driver(headless=True) if name == "milanuncios" else drivers.headless_driver()
+        try:
+            navigate(driver, url, config.get(f"ready_{kind}"), name, kind)
+            if kind == "profile":
+                scroll_to_load_all_items(driver, config["chk_items"], name)
+            save_fixture(url, driver.page_source, kind, "driver")
+        finally:
+            driver.quit()
+
+def bench_replay(names: list, runs: int = 5, use_driver: bool = False):
+    """
+    Run the collectors on the recorded pages, offline, and report extraction latency per
+    marketplace: the HTTP path (parse + embedded JSON + selectors) on every listing fixture,
+    and with use_driver the browser path on listing pages and the item lookups on profiles
+    (where the one-call profile script is also checked against the per-element extractors).
+    """
+    import io, contextlib
+    from constants import MARKETPLACES
+    from helpers import replay
+    from helpers.embedded import extract_embedded_listing
+    from helpers.scraping import fetch_listing_page, collect_listing_details_http, collect_listing_details_driver, read_profile_items
+    from helpers.utils import navigate
+    import marketplaces.vinted, marketplaces.wallapop, marketplaces.milanuncios  # register CONFIGs
+
+    replay.enable_replay()
+    quiet = lambda: contextlib.redirect_stdout(io.StringIO())
+    rows = []  # (marketplace, path, pages, median ms, complete)
+
+    for name in names or list(MARKETPLACES):
+        config = MARKETPLACES[name]["config"]
+        listings = replay.fixtures(name, "listing")
+        profiles = replay.fixtures(name, "profile")
+        if not listings and not profiles:
+            print(f"⚠️ No recorded pages for {name.capitalize()} (python benchmark.py record URL...)")
+            continue
+
+        timings, complete = [], 0
+        for fixture in listings:
+            for run in range(runs):
+                with quiet():
+                    start = time.perf_counter()
+                    page = fetch_listing_page(fixture["url"], name, config)
+                    embedded = extract_embedded_listing(page, config.get("col_json"), config.get("col_image_filter")) if page else {}
+                    result = collect_listing_details_http(fixture["url"], name, config, page=page, embedded=embedded) if page else None
+                    timings.append(time.perf_counter() - start)
+            complete += bool(result and all(result))
+        if listings:
+            rows.append((name, "http details", len(listings), statistics.median(timings) * 1000, complete))
+
+        if not use_driver:
+            continue
+        driver = drivers.headless_driver()
+        try:
+            timings, complete = [], 0
+            for fixture in listings:
+                for run in range(runs):
+                    with quiet():
+                        start = time.perf_counter()
+                        result = collect_listing_details_driver(driver, fixture["url"], name, config)
+                        timings.append(time.perf_counter() - start)
+                complete += bool(result and all(result))
+            if listings:
+                rows.append((name, "driver details", len(listings), statistics.median(timings) * 1000, complete))
+
+            timings, complete = [], 0
+            for fixture in profiles:
+                navigate(driver, fixture["url"], config.get("ready_profile"))
+                for run in range(runs):
+                    with quiet():
+                        start = time.perf_counter()
+                        _, items = read_profile_items(driver, config)
+                        timings.append(time.perf_counter() - start)
+                complete += bool(items and all(item["title"] and item["href"] for item in items))
+                if config.get("chk_items_script"):
+                    with quiet():
+                        _, extracted = read_profile_items(driver, {**config, "chk_items_script": False})
+                    scripted, extracted = ([item for item in found if item["href"]] for found in (items, extracted))  # unlinked items are skipped anyway
+                    if extracted != scripted:
+                        diff = next(((a, b) for a, b in zip(scripted, extracted) if a != b), (len(scripted), len(extracted)))
+                        print(f"⚠️ {name.capitalize()} profile script and extractors disagree on {fixture['url']}: {diff}")
+            if profiles:
+                rows.append((name, "profile items", len(profiles), statistics.median(timings) * 1000, complete))
+        finally:
+            driver.quit()
+
+    replay.enable_replay(False)
+    print(f"\n=== Extraction on recorded pages (median of {runs}) ===")
+    for name, path, pages, ms, complete in rows:
+        print(f"{name.capitalize():<12} {path:<15} {pages:>3} pages   {ms:8.1f} ms/page   {complete}/{pages} complete")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-Marketplace Tool benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("startup", help="driver launch time, with and without the binary cache")
+    p.add_argument("--runs", type=int, default=3)
+
+    p = sub.add_parser("navigation", help="page-load latency with the normal vs eager strategy")
+    p.add_argument("listing_urls", nargs="*", help="listing URLs to measure in addition to the homepages")
+    p.add_argument("--runs", type=int, default=3)
+
+    p = sub.add_parser("parsers", help="parse time and memory of each installed HTML parser backend")
+    p.add_argument("files", nargs="*", help="saved HTML pages (default: error_page_source.html)")
+    p.add_argument("--runs", type=int, default=5)
+
+    p = sub.add_parser("record", help="save live listing / profile pages as fixtures for offline runs")
+    p.add_argument("urls", nargs="+")
+    p.add_argument("--kind", choices=("listing", "profile"), default="listing")
+    p.add_argument("--driver", action="store_true", help="save the rendered DOM instead of the HTTP response")
+
+    p = sub.add_parser("replay", help="extraction latency per marketplace on the recorded pages (offline)")
+    p.add_argument("marketplaces", nargs="*", help="default: every marketplace with fixtures")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--driver", action="store_true", help="also time the browser collectors on the fixtures")
+
+    args = parser.parse_args()
+    if args.command == "startup":
+        bench_startup(args.runs)
+    elif args.command == "navigation":
+        bench_navigation(args.listing_urls, args.runs)
+    elif args.command == "parsers":
+        bench_parsers(args.files, args.runs)
+    elif args.command == "record":
+        record_fixtures(args.urls, args.kind, args.driver)
+    elif args.command == "replay":
+        bench_replay(args.marketplaces, args.runs, args.driver)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,13 @@ HEADERS = {
     "Connection": "keep-alive",
     "Upgrade-Insecure-Requests": "1"
 }
+# URL patterns (CDP Network.setBlockedURLs syntax) blocked on collect / check drivers
+COMMON_BLOCK_URLS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*criteo.*", "*scorecardresearch.com*",
+    "*bing.com/bat*", "*tiktok.com*", "*adnxs.com*", "*amazon-adsystem.com*",
+]
 MARKETPLACES = {
     "vinted": {
         "patterns": ("vinted.",),
@@ -1,3 +1,5 @@
+import time, threading
+
 import keyboard
 
 from constants import ABORT_FLAG
@@ -28,8 +30,14 @@ def reset_abort():
     ABORT_FLAG = False
 
 def check_abort(driver=None) -> bool:
-    """Check abort flag and optionally clean up driver."""
+    """
+    Check abort flag and optionally clean up driver. In a worker thread (start_worker) also True
+    once its deadline has passed or it was cancelled; that only stops this thread's work, so
+    nothing is cleaned up.
+    """
     global ABORT_FLAG
+    if not ABORT_FLAG and worker_cancelled():
+        return True
     if ABORT_FLAG:
         if driver:
             try:
@@ -44,4 +52,36 @@ def check_abort(driver=None) -> bool:
 
         return True
 
-    return False
\ No newline at end of file
+    return False
+
+
+# ---------------------------
+# Worker threads
+# ---------------------------
+# A worker running one step of a bigger job (e.g. one marketplace checker among several)
+# gets a deadline and a cancel event; its own check_abort calls start returning True when
+# either fires, so it stops at its next checkpoint while the other workers and the main loop
+# carry on. The event is what the main thread uses to stop its workers on ESC, since the
+# global flag is reset as soon as the main loop moves on. Workers must not prompt (input()).
+_WORKER = threading.local()
+
+def start_worker(deadline: float | None = None, cancel: threading.Event | None = None):
+    """Mark the calling thread as a worker, with an optional deadline (time.monotonic()) and cancel event."""
+    _WORKER.active = True
+    _WORKER.deadline = deadline
+    _WORKER.cancel = cancel
+
+def end_worker():
+    _WORKER.active = False
+    _WORKER.deadline = _WORKER.cancel = None
+
+def in_worker() -> bool:
+    """True in a worker thread, where nothing may wait for keyboard input."""
+    return getattr(_WORKER, "active", False)
+
+def worker_cancelled() -> bool:
+    if not in_worker():
+        return False
+    if _WORKER.cancel is not None and _WORKER.cancel.is_set():
+        return True
+    return _WORKER.deadline is not None and time.monotonic() >= _WORKER.deadline
@@ -0,0 +1,97 @@
+import sys, json, time, threading
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import MARKETPLACES, REQUIRED_FIELDS
+from helpers.parsing import detect_marketplace, collect_listing
+
+
+
+# ---------------------------
+# Batch collection
+# ---------------------------
+# Unattended collection of many listings: URLs grouped by marketplace, each marketplace
+# collected with its own concurrency limit (CONFIG "batch_concurrency"), every listing
+# written as one JSONL line as soon as it is done.
+DEFAULT_CONCURRENCY = 2
+
+
+def read_urls(source: str) -> list[str]:
+    """Listing URLs from a file (one per line, # comments allowed) or "-" for stdin, without duplicates."""
+    f = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        lines = [line.strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+def group_by_marketplace(urls: list) -> tuple[dict[str, list], list]:
+    """Return ({marketplace: [urls]}, [urls of unknown marketplaces])."""
+    groups, unknown = {}, []
+    for url in urls:
+        source = detect_marketplace(url)
+        if source:
+            groups.setdefault(source, []).append(url)
+        else:
+            unknown.append(url)
+    return groups, unknown
+
+def run_batch(urls: list, out_path: str) -> dict[str, dict]:
+    """
+    Collect every URL and append one JSON line per listing to out_path. The "images" paths
+    point into temp_images, which is left in place after a batch.
+    Returns {marketplace: {"ok": n, "failed": n}}.
+    """
+    groups, unknown = group_by_marketplace(urls)
+    for url in unknown:
+        print(f"❌ Could not detect marketplace, skipped: {url}")
+
+    limits = {
+        source: (MARKETPLACES[source]["config"] or {}).get("batch_concurrency", DEFAULT_CONCURRENCY)
+        for source in groups
+    }
+    totals = {source: {"ok": 0, "failed": 0} for source in groups}
+    write_lock = threading.Lock()
+
+    print(f"📦 Batch: {sum(len(u) for u in groups.values())} listings -> {out_path}")
+    for source, source_urls in groups.items():
+        print(f"   {source.capitalize():<12} {len(source_urls):>4} listings, {limits[source]} at a time")
+
+    def _collect(out, source, url):
+        start = time.perf_counter()
+        try:
+            listing = collect_listing(url, source) or {"url": url, "source": source}
+            error = None
+        except Exception as e:
+            listing, error = {"url": url, "source": source}, f"{type(e).__name__}: {e}"
+        ok = all(listing.get(field) for field in REQUIRED_FIELDS)
+        record = {**listing, "ok": ok, "error": error, "seconds": round(time.perf_counter() - start, 2)}
+
+        with write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            totals[source]["ok" if ok else "failed"] += 1
+        print(f"{'✅' if ok else '❌'} [{source}] {url}")
+
+    # one executor per marketplace: each runs at its own limit, all marketplaces at the same time
+    start = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out:
+        executors = [ThreadPoolExecutor(max_workers=max(1, limits[source])) for source in groups]
+        try:
+            futures = [
+                executor.submit(_collect, out, source, url)
+                for executor, (source, source_urls) in zip(executors, groups.items())
+                for url in source_urls
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+
+    count = len(futures)
+    print(f"\n📦 Batch done in {elapsed:.1f}s ({count / elapsed:.2f} listings/s)" if count else "\n📦 Nothing to collect")
+    for source, t in totals.items():
+        print(f"   {source.capitalize():<12} {t['ok']:>4} collected, {t['failed']:>4} incomplete")
+    return totals
@@ -1,4 +1,4 @@
-import os, time, pickle
+import os, pickle
 
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -6,39 +6,51 @@ from selenium.webdriver.common.by import By
 
 from constants import SCRIPT_DIR
 from helpers.abort import check_abort
-from helpers.drivers import visible_driver, headless_driver, is_headless
+from helpers.drivers import is_headless
+from helpers.pool import launch_driver, discard_driver, evict_idle
+from helpers.utils import navigate
+from helpers.waits import wait_until, any_present, dom_settled, element_gone, network_idle
 
 
 
-def try_accept_cookies(driver, timeout: float = 3):
+class LoginRequired(Exception):
+    """A worker thread found no valid session; the manual login has to run on the main thread."""
+
+
+CONSENT_BUTTON_IDS = ["didomi-notice-agree-button", "onetrust-accept-btn-handler", "accept-cookies", "acceptCookies"]
+CONSENT_BUTTON_CSS = [".didomi-button-highlight", "button[class*='cookie'][class*='accept']", ".accept-cookies"]
+
+def try_accept_cookies(driver, timeout: float = 3, marketplace: str = ""):
     """
     Attempt to find and click common cookie consent buttons.
     Tries multiple strategies simultaneously for maximum compatibility.
     """
     try:
-        # Wait briefly for any cookie popup to appear
-        time.sleep(1)
+        # Wait for a known cookie popup to appear, or for the page to settle without one
+        known = [(By.ID, i) for i in CONSENT_BUTTON_IDS] + [(By.CSS_SELECTOR, c) for c in CONSENT_BUTTON_CSS]
+        banner_or_settled = lambda d: any_present(known)(d) or dom_settled(500)(d)
+        wait_until(driver, banner_or_settled, marketplace, "cookie_banner", default=timeout)
         
         # Strategy 1: Try known IDs first (fastest)
-        for button_id in ["didomi-notice-agree-button", "onetrust-accept-btn-handler", "accept-cookies", "acceptCookies"]:
+        for button_id in CONSENT_BUTTON_IDS:
             try:
                 button = driver.find_element(By.ID, button_id)
                 if button.is_displayed() and button.is_enabled():
                     button.click()
                     print(f"✅ Cookie consent accepted (ID: {button_id})")
-                    time.sleep(0.5)
+                    wait_until(driver, element_gone(button), marketplace, "cookie_close", default=2)
                     return True
             except Exception:
                 continue
         
         # Strategy 2: Try common class patterns
-        for css in [".didomi-button-highlight", "button[class*='cookie'][class*='accept']", ".accept-cookies"]:
+        for css in CONSENT_BUTTON_CSS:
             try:
                 button = driver.find_element(By.CSS_SELECTOR, css)
                 if button.is_displayed() and button.is_enabled():
                     button.click()
                     print(f"✅ Cookie consent accepted (CSS: {css})")
-                    time.sleep(0.5)
+                    wait_until(driver, element_gone(button), marketplace, "cookie_close", default=2)
                     return True
             except Exception:
                 continue
@@ -53,12 +65,12 @@ def try_accept_cookies(driver, timeout: float = 3):
                         try:
                             button.click()
                             print(f"✅ Cookie consent accepted (text: {button.text[:30]})")
-                            time.sleep(0.5)
+                            wait_until(driver, element_gone(button), marketplace, "cookie_close", default=2)
                             return True
                         except Exception:
                             driver.execute_script("arguments[0].click();", button)
                             print(f"✅ Cookie consent accepted via JS (text: {button.text[:30]})")
-                            time.sleep(0.5)
+                            wait_until(driver, element_gone(button), marketplace, "cookie_close", default=2)
                             return True
         except Exception:
             pass
@@ -102,6 +114,33 @@ def load_cookies(driver, marketplace: str) -> list:
         print(f"⚠️ Cookie file is empty or corrupted for {marketplace.capitalize()}: {e}")
         return []
 
+def clearance_path(marketplace: str) -> str:
+    """Return the path of the anti-bot clearance saved from a browser session (kept apart from login cookies)."""
+    return os.path.join(os.path.dirname(cookie_path(marketplace)), f"{marketplace}_clearance.pkl")
+
+def save_clearance(driver, marketplace: str):
+    """
+    Save the cookies and user agent of a browser that got past the anti-bot check, so plain
+    HTTP requests can present the same clearance (the cookies are only valid with that user agent).
+    """
+    try:
+        clearance = {"user_agent": driver.execute_script("return navigator.userAgent"), "cookies": driver.get_cookies() or []}
+    except Exception as e:
+        print(f"⚠️ Could not read clearance cookies for {marketplace.capitalize()}: {e}")
+        return
+    if not clearance["cookies"]:
+        return
+    with open(clearance_path(marketplace), "wb") as f:
+        pickle.dump(clearance, f)
+
+def load_clearance(marketplace: str) -> dict | None:
+    """Return {"user_agent", "cookies"} saved by save_clearance, or None."""
+    try:
+        with open(clearance_path(marketplace), "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
 def apply_cookies(driver, cookies: list, homepage_url: str, marketplace: str):
     """Apply cookies to driver and reload homepage."""
     if not cookies:
@@ -112,8 +151,7 @@ def apply_cookies(driver, cookies: list, homepage_url: str, marketplace: str):
         return None
 
     try:
-        driver.get(homepage_url)
-        time.sleep(0.5)
+        navigate(driver, homepage_url, marketplace=marketplace, stage="home")  # cookies only need the domain to be open
     except Exception as e:
         print(f"⚠️ Could not open homepage before adding cookies: {e}")
 
@@ -150,8 +188,8 @@ def apply_cookies(driver, cookies: list, homepage_url: str, marketplace: str):
     if check_abort(driver): 
         return None
 
-    driver.get(homepage_url)
-    time.sleep(1)
+    navigate(driver, homepage_url, marketplace=marketplace, stage="home")
+    wait_until(driver, network_idle(), marketplace, "home_settled", default=3)  # logged-in state requests done
     return added > 0
 
 def is_logged_in(driver, login_check_selector: str) -> bool:
@@ -174,7 +212,7 @@ def ensure_logged_in(driver, login_check_selector: str, homepage_url: str, marke
         - None if login failed
     """
     print(f"🌍 Confirming if logged in on {marketplace.capitalize()}...")
-    driver.get(homepage_url)
+    navigate(driver, homepage_url, marketplace=marketplace, stage="home")
 
     if check_abort(driver): 
         return None
@@ -201,35 +239,31 @@ def ensure_logged_in(driver, login_check_selector: str, homepage_url: str, marke
 
     if is_headless(driver):
         print(f"🌍 Headless browser detected. Launching visible browser for manual login on {marketplace.capitalize()}...")
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        discard_driver(driver)
 
-        visible = visible_driver()
-        visible.get(homepage_url)
+        evict_idle(key=("visible", marketplace))  # an idle upload browser may hold the golden profile
+        visible = launch_driver("visible", marketplace)
+        navigate(visible, homepage_url, marketplace=marketplace, stage="home")
 
         input(f"❗ Please log in manually in the opened browser window for {marketplace.capitalize()}.\n👉 Press Enter here once you're logged in...")
 
         if is_logged_in(visible, login_check_selector):
             print(f"✅ Manual login successful. Saving cookies...")
             save_cookies(visible, marketplace)
-            try:
-                visible.quit()
-            except Exception:
-                pass
+            discard_driver(visible)
 
-            # Re-launch headless driver
+            # Re-launch headless driver (its profile is cloned from the now logged-in golden profile)
             print(f"🌍 Back to headless mode with logged-in session.")
-            driver = headless_driver()
+            driver = launch_driver("headless", marketplace)
             if check_abort():
                 return None
-            driver.get(homepage_url)
+            navigate(driver, homepage_url, marketplace=marketplace, stage="home")
             apply_cookies(driver, load_cookies(driver, marketplace), homepage_url, marketplace)
             return driver 
 
         else:
             print(f"❌ Manual login failed.")
+            discard_driver(visible)
             return None
 
     else:
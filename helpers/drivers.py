@@ -1,10 +1,140 @@
-import os, sys
+import os, sys, re, json, shutil, subprocess, threading
+from contextlib import contextmanager
 import undetected_chromedriver as uc
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 
+from constants import SCRIPT_DIR
+
+
+# ==========================================
+# Driver binary cache
+# ==========================================
+# Resolved chromedriver binaries are kept under SCRIPT_DIR, keyed by the installed
+# Chrome major version, so launches skip ChromeDriverManager's version lookup and
+# undetected-chromedriver's patching step (and work offline).
+DRIVER_CACHE_DIR = os.path.join(SCRIPT_DIR, "driver_cache")
+USE_DRIVER_CACHE = True  # set False to force resolution on every launch (benchmarking)
+DRIVER_EXE = "chromedriver.exe" if os.name == "nt" else "chromedriver"
+
+_CHROME_MAJOR = None
+
+def chrome_major_version() -> int | None:
+    """Return the installed Chrome major version, read locally (registry or --version)."""
+    global _CHROME_MAJOR
+    if _CHROME_MAJOR is not None:
+        return _CHROME_MAJOR or None
+
+    version = None
+    if sys.platform == "win32":
+        import winreg
+        for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(root, r"Software\Google\Chrome\BLBeacon") as key:
+                    version = winreg.QueryValueEx(key, "version")[0]
+                    break
+            except OSError:
+                continue
+    else:
+        for binary in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser",
+                       "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"):
+            try:
+                version = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+            except Exception:
+                continue
+            if version:
+                break
+
+    m = re.search(r"(\d+)\.\d+", version or "")
+    _CHROME_MAJOR = int(m.group(1)) if m else 0
+    return _CHROME_MAJOR or None
+
+def _cache_file(flavour: str) -> str | None:
+    """Path of the cached binary for a flavour ('chromedriver' or 'uc'), or None if Chrome is not found."""
+    major = chrome_major_version()
+    if not major:
+        return None
+    return os.path.join(DRIVER_CACHE_DIR, f"{flavour}-{major}", DRIVER_EXE)
+
+def _store_in_cache(src: str, dest: str):
+    """Copy a binary into the cache atomically and drop entries for older Chrome versions."""
+    dest_dir = os.path.dirname(dest)
+    os.makedirs(dest_dir, exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}-{threading.get_ident()}.part"  # concurrent launches may race on a cold cache
+    try:
+        shutil.copy2(src, tmp)
+        os.chmod(tmp, 0o755)
+        os.replace(tmp, dest)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        if not os.path.exists(dest):
+            raise
+        return  # another launch stored it first (and may be running it)
+
+    flavour = os.path.basename(dest_dir).rsplit("-", 1)[0]
+    for entry in os.listdir(DRIVER_CACHE_DIR):
+        if entry.startswith(f"{flavour}-") and entry != os.path.basename(dest_dir):
+            shutil.rmtree(os.path.join(DRIVER_CACHE_DIR, entry), ignore_errors=True)
+
+def chromedriver_path() -> str:
+    """Return a chromedriver for the installed Chrome, resolving it online only on a cache miss."""
+    cached = _cache_file("chromedriver") if USE_DRIVER_CACHE else None
+    if cached and os.path.exists(cached):
+        return cached
+
+    path = ChromeDriverManager().install()
+    if cached:
+        _store_in_cache(path, cached)
+        return cached
+    return path
+
+def uc_driver_path() -> str | None:
+    """
+    Return the cached chromedriver for undetected-chromedriver. On a cache miss a plain copy is
+    stored and uc patches it in place on first launch; later launches find it already patched.
+    Returns None when caching is off or Chrome cannot be detected (uc then resolves it itself).
+    """
+    cached = _cache_file("uc") if USE_DRIVER_CACHE else None
+    if cached and not os.path.exists(cached):
+        _store_in_cache(chromedriver_path(), cached)
+    return cached
+
+
+# stderr is process-wide: launches running at the same time (concurrent checks, batch mode)
+# share one devnull, opened by the first and restored by the last, instead of each swapping it.
+_STDERR_LOCK = threading.Lock()
+_STDERR_USERS = 0
+_DEVNULL = None
+
+@contextmanager
+def quiet_stderr():
+    """Silence Chrome / driver start-up noise on stderr, safely across threads."""
+    global _STDERR_USERS, _DEVNULL
+    with _STDERR_LOCK:
+        if _STDERR_USERS == 0:
+            _DEVNULL = open(os.devnull, "w")
+            sys.stderr = _DEVNULL
+        _STDERR_USERS += 1
+    try:
+        yield
+    finally:
+        with _STDERR_LOCK:
+            _STDERR_USERS -= 1
+            if _STDERR_USERS == 0:
+                sys.stderr = sys.__stderr__
+                _DEVNULL.close()
+                _DEVNULL = None
+
+
+# "eager" returns from driver.get() at DOMContentLoaded; call sites then wait for the
+# elements they need (see helpers.utils.navigate). "normal" waits for the full load event.
+PAGE_LOAD_STRATEGY = "eager"
+
 
 # ==========================================
 # Undetected Driver (Anti-bot bypass)
@@ -16,11 +146,13 @@ def undetected_options(headless=False):
     """
     o = uc.ChromeOptions()
     o.add_argument("--window-size=1920,1080")
+    o.page_load_strategy = PAGE_LOAD_STRATEGY
     o.add_argument("--disable-blink-features=AutomationControlled")
     o.add_argument("--disable-gpu")
     o.add_argument("--log-level=3")
     o.add_argument("--silent")
     o.add_experimental_option("prefs", {"profile.exit_type": "Normal"})
+    o.set_capability("goog:loggingPrefs", {"performance": "ALL"})  # for bytes-transferred stats
 
     if headless:
         o.add_argument("--headless=new")
@@ -33,18 +165,22 @@ def undetected_options(headless=False):
 
     return o
 
-def undetected_driver(headless=False):
+def undetected_driver(headless=False, profile_dir=None):
     """Chrome driver that bypasses bot detection (for sites like Milanuncios).
     Args:
         headless (bool): If True, runs browser in headless mode
+        profile_dir (str): Chrome user-data-dir to use (uc creates a temporary one if None)
     """
     opts = undetected_options(headless=headless)
     
-    # Suppress stderr
-    sys.stderr = open(os.devnull, "w")
-    driver = uc.Chrome(options=opts, version_main=None, headless=headless)  # Pass headless to uc.Chrome
-    sys.stderr.close()
-    sys.stderr = sys.__stderr__
+    with quiet_stderr():
+        driver = uc.Chrome(
+            options=opts,
+            version_main=chrome_major_version(),
+            driver_executable_path=uc_driver_path(),  # already patched after the first launch
+            user_data_dir=profile_dir,
+            headless=headless,
+        )
     
     # Additional stealth measures
     if headless:
@@ -66,14 +202,20 @@ def undetected_driver(headless=False):
 # ==========================================
 # Headless Driver
 # ==========================================
-def chrome_headless_options():
+def chrome_headless_options(profile_dir=None):
     o = Options()
     o.add_argument("--headless=new")
+    # keep every window / tab running at full speed (multi-window profile checks)
+    o.add_argument("--disable-background-timer-throttling")
+    o.add_argument("--disable-backgrounding-occluded-windows")
+    o.add_argument("--disable-renderer-backgrounding")
     o.add_argument("--window-size=1920,1080")
+    o.page_load_strategy = PAGE_LOAD_STRATEGY
     o.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                "AppleWebKit/537.36 (KHTML, like Gecko) "
                "Chrome/127.0.0.0 Safari/537.36")
-    o.add_argument(r"--user-data-dir=C:\\SeleniumProfile")
+    if profile_dir:
+        o.add_argument(f"--user-data-dir={profile_dir}")
     o.add_argument("--disable-blink-features=AutomationControlled")
     o.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
     o.add_experimental_option("useAutomationExtension", False)
@@ -83,15 +225,14 @@ def chrome_headless_options():
     o.add_argument("--silent")
     o.add_argument("--disable-logging")
     o.add_argument("--v=0")
+    o.set_capability("goog:loggingPrefs", {"performance": "ALL"})  # for bytes-transferred stats
     return o
 
-def headless_driver():
-    opts = chrome_headless_options()
-    sys.stderr = open(os.devnull, "w")
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=opts)
-    sys.stderr.close()
-    sys.stderr = sys.__stderr__
+def headless_driver(profile_dir=None):
+    opts = chrome_headless_options(profile_dir)
+    with quiet_stderr():
+        service = Service(chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=opts)
     # Stealth
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
         "source": "Object.defineProperty(navigator, 'webdriver', { get: () => undefined })"
@@ -105,13 +246,49 @@ def is_headless(driver):
     return getattr(driver, "_is_headless", False)
 
 
+# ==========================================
+# Resource blocking
+# ==========================================
+def scraping_block_list(config: dict, images: bool = True) -> list:
+    """
+    URL patterns to block on collect / check drivers (fonts, styles, trackers, full-size images).
+    images=False keeps image requests flowing, e.g. when their bodies are captured from the browser.
+    """
+    patterns = list(config.get("block_urls") or [])
+    if images:
+        patterns += list(config.get("block_image_urls") or [])
+    return patterns
+
+def enable_body_capture(driver):
+    """Give the Network domain enough buffer to keep image response bodies for Network.getResponseBody."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {
+            "maxTotalBufferSize": 200 * 1024 * 1024,
+            "maxResourceBufferSize": 20 * 1024 * 1024,
+        })
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not enable response capture: {e}")
+        return False
+
+def set_resource_blocking(driver, patterns: list | None):
+    """Block requests matching the given URL patterns via CDP. An empty list clears blocking."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns or [])})
+    except Exception as e:
+        print(f"⚠️ Could not set resource blocking: {e}")
+
+
 # ==========================================
 # Visible Driver
 # ==========================================
-def chrome_visible_options():
+def chrome_visible_options(profile_dir=None):
     o = Options()
     o.add_argument("--window-size=1920,1080")
-    o.add_argument(r"--user-data-dir=C:\\SeleniumProfile")
+    o.page_load_strategy = PAGE_LOAD_STRATEGY
+    if profile_dir:
+        o.add_argument(f"--user-data-dir={profile_dir}")
     o.add_argument("--disable-blink-features=AutomationControlled")
     o.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
     o.add_experimental_option("useAutomationExtension", False)
@@ -123,13 +300,11 @@ def chrome_visible_options():
     o.add_argument("--v=0")
     return o
 
-def visible_driver():  # full Chrome (non-headless) with stealth profile for uploading
-    opts = chrome_visible_options()
-    sys.stderr = open(os.devnull, "w") # Suppress chromedriver noise
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=opts)
-    sys.stderr.close()
-    sys.stderr = sys.__stderr__
+def visible_driver(profile_dir=None):  # full Chrome (non-headless) with stealth profile for uploading
+    opts = chrome_visible_options(profile_dir)
+    with quiet_stderr():  # Suppress chromedriver noise
+        service = Service(chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=opts)
     # Stealth
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
         "source": "Object.defineProperty(navigator, 'webdriver', { get: () => undefined })"
@@ -141,3 +316,38 @@ def visible_driver():  # full Chrome (non-headless) with stealth profile for upl
     return driver
 
 
+# ==========================================
+# Network log
+# ==========================================
+def read_network_log(driver) -> dict:
+    """
+    Drain the driver's performance log into driver._network: bytes received, number of blocked
+    requests, and the requestId of every image response (for Network.getResponseBody).
+    """
+    net = getattr(driver, "_network", None)
+    if net is None:
+        net = driver._network = {"enabled": True, "bytes": 0, "blocked": 0, "images": {}}
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        net["enabled"] = False
+        return net
+
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except Exception:
+            continue
+        method, params = message.get("method"), message.get("params") or {}
+        if method == "Network.loadingFinished":
+            net["bytes"] += int(params.get("encodedDataLength") or 0)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            net["blocked"] += 1
+        elif method == "Network.responseReceived" and params.get("type") == "Image":
+            net["images"][params["response"]["url"]] = params["requestId"]
+    return net
+
+def reset_network_log(driver):
+    """Forget everything logged so far (e.g. by the previous borrower of a pooled driver)."""
+    read_network_log(driver)
+    driver._network = None
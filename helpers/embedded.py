@@ -0,0 +1,110 @@
+import json
+
+from helpers.parsers import find_all
+
+
+
+# ---------------------------
+# Embedded page JSON
+# ---------------------------
+# Listing pages ship the whole item as JSON (Next.js __NEXT_DATA__, schema.org JSON-LD).
+# Reading it gives every field and the complete photo list from the raw HTML, no browser needed.
+# Each marketplace describes where its fields live with a "col_json" list in CONFIG:
+#   {"source": "next_data" | "ld+json", "type": "Product" (ld+json only), "root": path,
+#    "title": path, "price": path, "currency": path, "description": path, "images": path}
+# A path is a list of dict keys / list indexes; "*" fans out over every element of a list.
+JSON_FIELDS = ("title", "price", "description", "images")
+
+
+def embedded_json(page: dict, source: str) -> list:
+    """Return the decoded JSON documents of one kind embedded in the page."""
+    docs = []
+    if source == "next_data":
+        tags = find_all(page, ["script", "id", "__NEXT_DATA__"], limit=1)
+    elif source == "ld+json":
+        tags = find_all(page, ["script", "type", "application/ld+json"])
+    else:
+        raise ValueError(f"Unknown embedded JSON source: {source}")
+
+    for tag in tags:
+        try:
+            data = json.loads(tag["raw"])
+        except (TypeError, ValueError):
+            continue
+        # JSON-LD may hold a list of nodes or an @graph
+        if isinstance(data, dict) and "@graph" in data:
+            data = data["@graph"]
+        docs.extend(data if isinstance(data, list) else [data])
+    return docs
+
+def json_path(data, path: list):
+    """Follow a path into decoded JSON. Returns None if missing; a list when the path contains "*"."""
+    for i, key in enumerate(path or []):
+        if key == "*":
+            if not isinstance(data, list):
+                data = [data]
+            rest = path[i + 1:]
+            values = [json_path(item, rest) for item in data]
+            return [v for v in values if v is not None]
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+def _format_price(amount, currency) -> str | None:
+    """Format a JSON price the way the listing page shows it (e.g. '25,50 €')."""
+    try:
+        value = f"{float(str(amount).replace(',', '.')):.2f}".replace(".", ",")
+    except (TypeError, ValueError):
+        return None
+    symbol = "€" if currency in (None, "EUR", "€") else currency
+    return f"{value} {symbol}"
+
+def _as_text(value) -> str | None:
+    if isinstance(value, dict):  # e.g. {"original": "...", "translated": "..."}
+        value = value.get("original") or next(iter(value.values()), None)
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+def extract_embedded_listing(page: dict, specs: list, image_filter=None) -> dict:
+    """
+    Read title, price, description and image URLs from the page's embedded JSON.
+    Specs are tried in order; each field keeps the first value found. Missing fields are
+    simply absent from the result, so callers can fall back to HTML selectors for them.
+    image_filter (CONFIG "col_image_filter") drops image URLs like the HTML path does.
+    """
+    found = {}
+    for spec in specs or []:
+        for doc in embedded_json(page, spec["source"]):
+            if spec.get("type"):
+                doc_type = doc.get("@type") if isinstance(doc, dict) else None
+                if spec["type"] != doc_type and not (isinstance(doc_type, list) and spec["type"] in doc_type):
+                    continue
+            root = json_path(doc, spec.get("root"))
+            if root is None:
+                continue
+
+            if "title" not in found and spec.get("title") and (title := _as_text(json_path(root, spec.get("title")))):
+                found["title"] = title
+            if "description" not in found and spec.get("description") and (desc := _as_text(json_path(root, spec.get("description")))):
+                found["description"] = desc
+            if "price" not in found and spec.get("price"):
+                amount = json_path(root, spec["price"])
+                if amount not in (None, "", []):
+                    currency = json_path(root, spec["currency"]) if spec.get("currency") else None
+                    price = _format_price(amount, currency)
+                    if price:
+                        found["price"] = price
+            if "images" not in found and spec.get("images"):
+                images = json_path(root, spec["images"])
+                images = images if isinstance(images, list) else [images]
+                images = [i.get("contentUrl") or i.get("url") if isinstance(i, dict) else i for i in images]  # JSON-LD ImageObject
+                images = list(dict.fromkeys(i for i in images if isinstance(i, str) and i.startswith("http")))
+                if image_filter:
+                    images = [i for i in images if image_filter(i)]
+                if images:
+                    found["images"] = images
+
+            if all(f in found for f in JSON_FIELDS):
+                return found
+    return found
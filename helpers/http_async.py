@@ -0,0 +1,219 @@
+import os, time, asyncio, threading
+from urllib.parse import urlsplit
+try:
+    import httpx
+    HAVE_HTTPX = True
+except Exception:
+    HAVE_HTTPX = False
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HAVE_HTTP2 = HAVE_HTTPX
+except Exception:
+    HAVE_HTTP2 = False
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from constants import HEADERS
+from helpers import http_session, replay
+
+
+
+# ---------------------------
+# Async HTTP backend (optional)
+# ---------------------------
+# With httpx installed (pip install "httpx[http2]"), listing pages and images are fetched by
+# one AsyncClient running on a background event loop. Over HTTP/2 every request to a CDN is
+# multiplexed on one connection, so hundreds of profile thumbnails need a handful of
+# connections. Listing pages come through the disk cache (helpers/http_cache.py), whose
+# network requests use get() below; listing photos are streamed straight to disk
+# (download_many), so memory does not grow with their size. The sync wrappers below are what
+# the rest of the code calls; without httpx, get() falls back to the shared requests session
+# and images are streamed one by one by helpers/images.py.
+USE_ASYNC_HTTP = True        # set False to always use the requests session
+MAX_CONNECTIONS = 32
+REQUESTS_PER_HOST = 16       # in-flight requests per host (streams on the HTTP/2 connection)
+TIMEOUT = 10
+CHUNK_SIZE = 64 * 1024       # downloads are written to disk in chunks of this size
+
+_LOOP: asyncio.AbstractEventLoop | None = None
+_CLIENT = None
+_HOST_SLOTS: dict[str, asyncio.Semaphore] = {}  # only touched from the loop thread
+_LOCK = threading.Lock()
+
+
+def async_enabled() -> bool:
+    return USE_ASYNC_HTTP and HAVE_HTTPX and not replay.replaying()
+
+def _loop() -> asyncio.AbstractEventLoop:
+    """Start (once) the background thread running the event loop the client lives on."""
+    global _LOOP
+    with _LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="http-async", daemon=True).start()
+        return _LOOP
+
+def _run(coro):
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _loop()).result()
+
+def _client():
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            http2=HAVE_HTTP2,
+            headers={**HEADERS, "Accept-Encoding": http_session.session().headers["Accept-Encoding"]},
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            timeout=TIMEOUT,
+            follow_redirects=True,
+        )
+    return _CLIENT
+
+def _host_slot(host: str, limits: dict | None) -> asyncio.Semaphore:
+    if host not in _HOST_SLOTS:
+        _HOST_SLOTS[host] = asyncio.Semaphore((limits or {}).get(host, REQUESTS_PER_HOST))
+    return _HOST_SLOTS[host]
+
+async def _send(url: str, host: str, stream: bool = False, headers: dict | None = None):
+    """
+    Send a GET with the same per-host rate limit and retry policy as http_session.get (the
+    caller holds the host slot). Returns (response, start time); raises on network errors.
+    """
+    retries = http_session.max_retries(host)
+    for attempt in range(retries + 1):
+        wait = http_session.reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        start = time.perf_counter()
+        try:
+            r = await _client().send(_client().build_request("GET", url, headers=headers), stream=stream)
+        except httpx.TransportError:
+            if attempt == retries:
+                http_session.record_request(host, errors=1)
+                raise
+            http_session.record_request(host, retries=1)
+            await asyncio.sleep(http_session.retry_delay(host, attempt))
+            continue
+        except Exception:
+            http_session.record_request(host, errors=1)
+            raise
+        if r.status_code in http_session.RETRY_STATUSES and attempt < retries:
+            http_session.record_request(
+                host, requests=1, retries=1, throttled=int(r.status_code == 429), seconds=time.perf_counter() - start,
+            )
+            if stream:
+                await r.aclose()
+            await asyncio.sleep(http_session.retry_delay(host, attempt, r.headers.get("Retry-After")))
+            continue
+        return r, start
+
+async def aget(url: str, host_limits: dict | None = None, headers: dict | None = None):
+    """
+    GET one URL with the shared AsyncClient, under the same per-host rate limit and retry
+    policy as http_session.get. Raises on network errors, like http_session.get.
+    """
+    host = urlsplit(url).hostname or ""
+    async with _host_slot(host, host_limits):
+        r, start = await _send(url, host, headers=headers)
+    http_session.record_request(
+        host, requests=1, bytes=len(r.content), seconds=time.perf_counter() - start,
+        http2=int(r.http_version == "HTTP/2"),
+    )
+    return r
+
+async def adownload(url: str, path: str, check=None, max_bytes: int | None = None, host_limits: dict | None = None):
+    """
+    Stream one URL into path chunk by chunk (never held in memory), via a private .part file
+    renamed into place once complete. check(headers, head) gets the headers and the first
+    chunk of the body (b"" if empty) and may raise to refuse it before anything is written.
+    Returns the response headers; raises on errors and non-2xx statuses.
+    """
+    host = urlsplit(url).hostname or ""
+    part = f"{path}.{os.getpid()}-{threading.get_ident()}-{id(asyncio.current_task())}.part"
+    size = 0
+    async with _host_slot(host, host_limits):
+        r, start = await _send(url, host, stream=True)
+        try:
+            r.raise_for_status()
+            body = r.aiter_bytes(CHUNK_SIZE)
+            chunk = await anext(body, b"")
+            if check:
+                check(r.headers, chunk)
+            with open(part, "wb") as f:
+                while chunk:
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        raise ValueError(f"response too large (> {max_bytes // 1024} KB)")
+                    f.write(chunk)
+                    chunk = await anext(body, b"")
+            os.replace(part, path)
+        except BaseException as e:
+            try:
+                os.remove(part)
+            except OSError:
+                pass
+            if isinstance(e, httpx.TransportError):
+                http_session.record_request(host, errors=1)
+            raise
+        finally:
+            await r.aclose()
+    http_session.record_request(
+        host, requests=1, bytes=size, seconds=time.perf_counter() - start,
+        http2=int(r.http_version == "HTTP/2"),
+    )
+    return r.headers
+
+
+# ---------------------------
+# Sync wrappers
+# ---------------------------
+def _as_requests_response(r) -> requests.Response:
+    """Copy an httpx response (body already read) into a requests.Response."""
+    resp = requests.Response()
+    resp.status_code = r.status_code
+    resp.url = str(r.url)
+    resp.headers = CaseInsensitiveDict(r.headers)
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp._content = r.content
+    resp._content_consumed = True  # iter_content() reads _content, like a non-streamed request
+    return resp
+
+def get(url: str, headers: dict | None = None, cookies: dict | None = None) -> requests.Response:
+    """
+    Fetch one URL (a listing page) with the async client, returned as a requests.Response so
+    it works wherever an http_session.get result does. The body is read whole, so use it for
+    pages and download_many for images. Without httpx this is http_session.get.
+    """
+    if not async_enabled():
+        return http_session.get(url, headers=headers, cookies=cookies)
+    if cookies:
+        headers = {**(headers or {}), "Cookie": "; ".join(f"{k}={v}" for k, v in cookies.items())}
+    return _as_requests_response(_run(aget(url, headers=headers)))
+
+def download_many(jobs: list, check=None, max_bytes: int | None = None, host_limits: dict | None = None) -> list:
+    """
+    Stream several (url, path) downloads to disk at once (see adownload); peak memory is a
+    chunk per request in flight, whatever the size of the files. Returns the response headers
+    in the order of jobs, with the exception in place of any download that failed.
+    Only available with the async backend (see async_enabled).
+    """
+    async def _all():
+        return await asyncio.gather(
+            *(adownload(u, path, check, max_bytes, host_limits) for u, path in jobs), return_exceptions=True,
+        )
+    return _run(_all())
+
+def close_async():
+    """Close the async client and stop its loop (end of the program)."""
+    global _CLIENT, _LOOP
+    with _LOCK:
+        if _LOOP is None:
+            return
+        if _CLIENT is not None:
+            asyncio.run_coroutine_threadsafe(_CLIENT.aclose(), _LOOP).result()
+            _CLIENT = None
+        _LOOP.call_soon_threadsafe(_LOOP.stop)
+        _LOOP = None
+        _HOST_SLOTS.clear()
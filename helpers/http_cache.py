@@ -0,0 +1,230 @@
+import os, json, time, atexit, hashlib, threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from constants import SCRIPT_DIR
+from helpers import http_async, http_session, replay
+
+
+
+# ---------------------------
+# Disk HTTP cache
+# ---------------------------
+# Listing pages and images fetched over HTTP are kept under SCRIPT_DIR/http_cache, so a
+# listing collected again (e.g. after a failed upload) or a thumbnail seen in several
+# profile checks is not downloaded again. Within its TTL an entry is served straight from
+# disk; after that it is revalidated with If-None-Match / If-Modified-Since and a 304 costs
+# no body. Least recently used entries are evicted once the cache exceeds MAX_CACHE_BYTES.
+USE_HTTP_CACHE = True
+CACHE_DIR = os.path.join(SCRIPT_DIR, "http_cache")
+INDEX_FILE = os.path.join(CACHE_DIR, "index.json")
+MAX_CACHE_BYTES = 300 * 1024 * 1024
+MAX_ENTRY_BYTES = 20 * 1024 * 1024   # bigger responses are passed through uncached
+CHUNK_SIZE = 64 * 1024
+# Seconds an entry is used without revalidation, per kind; a marketplace CONFIG can override
+# them with "cache_ttl": {"page": ..., "image": ...} (matched on its URL patterns, CDNs included)
+DEFAULT_TTL = {"page": 0, "image": 24 * 3600}
+KEPT_HEADERS = ("Content-Type", "Content-Length", "ETag", "Last-Modified")
+
+_INDEX: OrderedDict[str, dict] = OrderedDict()  # key -> meta, least recently used first
+_LOCK = threading.Lock()
+_LOADED = False
+
+
+def _key(url: str) -> str:
+    return hashlib.sha1(url.encode()).hexdigest()
+
+def _body_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+def _load_index():
+    global _LOADED
+    if _LOADED:
+        return
+    _LOADED = True
+    try:
+        with open(INDEX_FILE, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return
+    for key, meta in sorted(entries.items(), key=lambda kv: kv[1].get("accessed", 0)):
+        if os.path.exists(_body_path(key)):
+            _INDEX[key] = meta
+
+@atexit.register
+def _save_index():
+    if not _LOADED:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with _LOCK:
+            data = json.dumps(dict(_INDEX))
+        tmp = f"{INDEX_FILE}.{os.getpid()}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, INDEX_FILE)
+    except OSError:
+        pass
+
+def ttl_for(url: str, kind: str) -> float:
+    """TTL of a URL: the owning marketplace's CONFIG["cache_ttl"] if set, else DEFAULT_TTL."""
+    overrides = http_session.marketplace_config(urlsplit(url).hostname or "").get("cache_ttl") or {}
+    return overrides.get(kind, DEFAULT_TTL.get(kind, 0))
+
+def _lookup(key: str) -> dict | None:
+    with _LOCK:
+        _load_index()
+        meta = _INDEX.get(key)
+        if meta is not None:
+            _INDEX.move_to_end(key)
+            meta["accessed"] = time.time()
+        return meta
+
+def _evict():
+    """Drop least recently used entries until the cache fits in MAX_CACHE_BYTES."""
+    with _LOCK:
+        total = sum(m["size"] for m in _INDEX.values())
+        while total > MAX_CACHE_BYTES and _INDEX:
+            key, meta = _INDEX.popitem(last=False)
+            total -= meta["size"]
+            try:
+                os.remove(_body_path(key))
+            except OSError:
+                pass
+
+def _cached_response(url: str, key: str, meta: dict, stream: bool) -> requests.Response:
+    """Build a Response served from the cached body (streamed from disk when stream=True)."""
+    r = requests.Response()
+    r.status_code = 200
+    r.url = url
+    r.headers = CaseInsensitiveDict(meta["headers"])
+    r.encoding = get_encoding_from_headers(r.headers)
+    f = open(_body_path(key), "rb")
+    if stream:
+        r.raw = f  # iter_content reads the file chunk by chunk; closed with the response
+    else:
+        with f:
+            r._content = f.read()
+    http_session.record_request(urlsplit(url).hostname or "", cached=1)
+    return r
+
+def _write_body(key: str, chunks) -> int:
+    """Write a body to the cache via a .part file renamed into place. Returns its size."""
+    path = _body_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part = f"{path}.{os.getpid()}-{threading.get_ident()}.part"
+    size = 0
+    try:
+        with open(part, "wb") as f:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_ENTRY_BYTES:
+                    raise ValueError("response too large to cache")
+                f.write(chunk)
+        os.replace(part, path)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    return size
+
+def _add(url: str, key: str, headers, size: int) -> dict:
+    kept = {h: headers[h] for h in KEPT_HEADERS if h in headers}
+    kept["Content-Length"] = str(size)  # decoded size (bodies are stored decompressed)
+    meta = {"url": url, "headers": kept, "size": size, "stored": time.time(), "accessed": time.time()}
+    with _LOCK:
+        _load_index()
+        _INDEX[key] = meta
+        _INDEX.move_to_end(key)
+    _evict()
+    return meta
+
+def _fetch(url: str, kind: str, stream: bool = False, headers: dict | None = None, cookies: dict | None = None) -> requests.Response:
+    """The network request: pages over the async backend (HTTP/2) when it is enabled, else the requests session."""
+    if kind == "page" and http_async.async_enabled():
+        return http_async.get(url, headers=headers, cookies=cookies)
+    return http_session.get(url, stream=stream, headers=headers, cookies=cookies)
+
+def get(url: str, kind: str = "page", stream: bool = False, headers: dict | None = None, cookies: dict | None = None) -> requests.Response:
+    """
+    GET through the disk cache. Fresh entries are served from disk, stale ones revalidated;
+    anything that is not a cacheable 200 is returned exactly as the server sent it.
+    Extra headers / cookies are sent with the request (they are not part of the cache key).
+    """
+    extra = {"headers": headers, "cookies": cookies}
+    if not USE_HTTP_CACHE or replay.replaying():
+        return _fetch(url, kind, stream, **extra)
+
+    key = _key(url)
+    meta = _lookup(key)
+    if meta and time.time() - meta["stored"] < ttl_for(url, kind):
+        try:
+            return _cached_response(url, key, meta, stream)
+        except OSError:
+            meta = None  # body evicted in the meantime
+
+    conditional = dict(headers or {})
+    if meta and meta["headers"].get("ETag"):
+        conditional["If-None-Match"] = meta["headers"]["ETag"]
+    if meta and meta["headers"].get("Last-Modified"):
+        conditional["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+    r = _fetch(url, kind, True, headers=conditional, cookies=cookies)
+    if r.status_code == 304 and meta:
+        r.close()
+        meta["stored"] = time.time()
+        try:
+            return _cached_response(url, key, meta, stream)
+        except OSError:
+            return _fetch(url, kind, stream, **extra)
+
+    cacheable = (
+        r.status_code == 200
+        and "no-store" not in r.headers.get("Cache-Control", "")
+        and int(r.headers.get("Content-Length") or 0) <= MAX_ENTRY_BYTES
+    )
+    if not cacheable:
+        if not stream:
+            r.content  # read the body like a normal (non-streamed) request would
+        return r
+    try:
+        size = _write_body(key, r.iter_content(CHUNK_SIZE))
+    except ValueError:
+        return _fetch(url, kind, stream, **extra)  # too large: fetch it uncached
+    finally:
+        r.close()
+    return _cached_response(url, key, _add(url, key, r.headers, size), stream)
+
+def store_file(url: str, path: str, headers):
+    """Add a body already written to a file (e.g. streamed by the async backend) to the cache."""
+    if not USE_HTTP_CACHE or os.path.getsize(path) > MAX_ENTRY_BYTES:
+        return
+    key = _key(url)
+    with open(path, "rb") as f:
+        _add(url, key, headers, _write_body(key, iter(lambda: f.read(CHUNK_SIZE), b"")))
+
+def forget(url: str):
+    """Drop a URL from the cache (e.g. an anti-bot challenge page that was served as a 200)."""
+    with _LOCK:
+        _load_index()
+        meta = _INDEX.pop(_key(url), None)
+    if meta:
+        try:
+            os.remove(_body_path(_key(url)))
+        except OSError:
+            pass
+
+def is_fresh(url: str, kind: str) -> bool:
+    """True if url can be served from the cache without any request."""
+    if not USE_HTTP_CACHE:
+        return False
+    with _LOCK:
+        _load_index()
+        meta = _INDEX.get(_key(url))
+    return bool(meta) and time.time() - meta["stored"] < ttl_for(url, kind)
@@ -0,0 +1,241 @@
+import time, random, threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from constants import HEADERS, MARKETPLACES
+from helpers import replay
+
+
+
+# ---------------------------
+# Shared HTTP session
+# ---------------------------
+# One keep-alive session for every page, image and thumbnail fetched outside the browser,
+# so requests to the same host reuse their TCP+TLS connection instead of opening a new one.
+# urllib3 keeps one connection pool per host; a Session is safe to share between threads.
+POOL_HOSTS = 16     # hosts kept in the pool manager (marketplaces + their CDNs)
+POOL_PER_HOST = 8   # connections kept alive per host (>= the parallel downloads per host)
+TIMEOUT = 10
+
+_SESSION: requests.Session | None = None
+_LOCK = threading.Lock()
+_HOST_STATS: dict[str, dict] = {}   # host -> {"requests", "bytes", "seconds", "errors", "http2", "cached", "retries", "throttled"}
+_CONN_BASELINE: dict[str, int] = {}  # host -> connections already opened at the last reset
+
+
+def _accept_encoding() -> str:
+    """Only advertise brotli when a decoder is installed, otherwise responses come back undecodable."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        pass
+    try:
+        import brotlicffi  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+def session() -> requests.Session:
+    """Return the process-wide HTTP session, creating it on first use."""
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            s = requests.Session()
+            s.headers.update(HEADERS)
+            s.headers["Accept-Encoding"] = _accept_encoding()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _SESSION = s
+        return _SESSION
+
+def get(url: str, timeout: float = TIMEOUT, **kwargs) -> requests.Response:
+    """
+    GET through the shared session, paced by the host's rate limit and retried on 429 / 5xx /
+    connection errors (see below). Every attempt is recorded in the per-host stats.
+    While replaying (helpers/replay.py) the recorded page is returned and nothing is sent.
+    """
+    if replay.replaying():
+        return replay.replay_response(url)
+    host = urlsplit(url).hostname or ""
+    retries = max_retries(host)
+    for attempt in range(retries + 1):
+        throttle(host)
+        start = time.perf_counter()
+        try:
+            r = session().get(url, timeout=timeout, **kwargs)
+        except RETRY_EXCEPTIONS:
+            if attempt == retries:
+                record_request(host, errors=1)
+                raise
+            record_request(host, retries=1)
+            time.sleep(retry_delay(host, attempt))
+            continue
+        except Exception:
+            record_request(host, errors=1)
+            raise
+        if r.status_code in RETRY_STATUSES and attempt < retries:
+            delay = retry_delay(host, attempt, r.headers.get("Retry-After"))
+            r.close()
+            record_request(host, requests=1, retries=1, throttled=int(r.status_code == 429), seconds=time.perf_counter() - start)
+            time.sleep(delay)
+            continue
+        break
+    size = int(r.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(r.content)
+    record_request(host, requests=1, bytes=size, seconds=time.perf_counter() - start)
+    return r
+
+def close_session():
+    """Close every pooled connection (end of the program)."""
+    global _SESSION
+    with _LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
+        _CONN_BASELINE.clear()
+
+
+# ---------------------------
+# Rate limiting and retries
+# ---------------------------
+# Each host gets a token bucket: "burst" requests may go out at once, then "rate" per second.
+# Every HTTP request (sync or async) takes a token first, so bursts of thumbnail hashing stay
+# under what the site tolerates. 429 / 5xx / connection errors are retried with jittered
+# exponential backoff; a Retry-After from the server pauses the whole host, not just one request.
+# A marketplace CONFIG can set its own limits for all its hosts (CDNs included):
+#   "rate_limit": {"rate": requests per second, "burst": tokens}, "http_retries": n
+DEFAULT_RATE_LIMIT = {"rate": 10.0, "burst": 20}
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5     # seconds; attempt n waits a random time up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 30.0     # longest wait between attempts (Retry-After included)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+_BUCKETS: dict[str, dict] = {}  # host -> {"rate", "burst", "tokens", "updated", "paused_until"}
+_BUCKET_LOCK = threading.Lock()
+
+
+def marketplace_config(host: str) -> dict:
+    """CONFIG of the marketplace a host belongs to (matched on its URL patterns), or {}."""
+    host = host.lower()
+    for data in MARKETPLACES.values():
+        if any(p in host for p in data["patterns"]):
+            return data.get("config") or {}
+    return {}
+
+def max_retries(host: str) -> int:
+    return marketplace_config(host).get("http_retries", MAX_RETRIES)
+
+def _bucket(host: str) -> dict:
+    if host not in _BUCKETS:
+        limit = {**DEFAULT_RATE_LIMIT, **(marketplace_config(host).get("rate_limit") or {})}
+        _BUCKETS[host] = {
+            "rate": float(limit["rate"]), "burst": float(limit["burst"]),
+            "tokens": float(limit["burst"]), "updated": time.monotonic(), "paused_until": 0.0,
+        }
+    return _BUCKETS[host]
+
+def reserve(host: str) -> float:
+    """
+    Take a token from the host's bucket and return how long to wait before sending.
+    Tokens may go negative: each caller reserves its own slot, so waiters leave in order.
+    """
+    with _BUCKET_LOCK:
+        b = _bucket(host)
+        now = time.monotonic()
+        b["tokens"] = min(b["burst"], b["tokens"] + (now - b["updated"]) * b["rate"])
+        b["updated"] = now
+        b["tokens"] -= 1
+        wait = -b["tokens"] / b["rate"] if b["tokens"] < 0 else 0.0
+        return max(wait, b["paused_until"] - now)
+
+def throttle(host: str):
+    """Block until the host's rate limit lets one more request through."""
+    wait = reserve(host)
+    if wait > 0:
+        time.sleep(wait)
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(host: str, attempt: int, retry_after: str | None = None) -> float:
+    """
+    Seconds to wait before retry number attempt + 1: the server's Retry-After when given
+    (then the whole host is paused), otherwise full-jitter exponential backoff.
+    """
+    seconds = _retry_after_seconds(retry_after)
+    if seconds is None:
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    seconds = min(seconds, BACKOFF_MAX)
+    with _BUCKET_LOCK:
+        b = _bucket(host)
+        b["paused_until"] = max(b["paused_until"], time.monotonic() + seconds)
+    return seconds
+
+
+# ---------------------------
+# Pool statistics
+# ---------------------------
+def record_request(host: str, **values):
+    """Add to a host's counters (also used by the async backend in helpers/http_async.py)."""
+    with _LOCK:
+        stats = _HOST_STATS.setdefault(host, {
+            "requests": 0, "bytes": 0, "seconds": 0.0, "errors": 0, "http2": 0, "cached": 0, "retries": 0, "throttled": 0,
+        })
+        for k, v in values.items():
+            stats[k] += v
+
+def _opened_connections() -> dict[str, int]:
+    """Connections opened so far per host, read from the urllib3 pools of the session."""
+    opened = {}
+    if _SESSION is None:
+        return opened
+    for adapter in set(_SESSION.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened[pool.host] = opened.get(pool.host, 0) + pool.num_connections
+    return opened
+
+def http_stats() -> dict[str, dict]:
+    """Per-host requests, bytes, seconds, errors and new connections since the last reset."""
+    with _LOCK:
+        stats = {host: dict(s) for host, s in _HOST_STATS.items()}
+        opened = _opened_connections()
+        for host, s in stats.items():
+            s["connections"] = opened.get(host, 0) - _CONN_BASELINE.get(host, 0)
+    return stats
+
+def reset_http_stats():
+    with _LOCK:
+        _HOST_STATS.clear()
+        _CONN_BASELINE.clear()
+        _CONN_BASELINE.update(_opened_connections())
+
+def print_http_stats():
+    """Print how many requests each host served and how many connections they needed."""
+    stats = http_stats()
+    if not stats:
+        return
+    print("\n🌐 HTTP this run (shared session):")
+    for host, s in sorted(stats.items()):
+        errors = f" | {s['errors']} failed" if s["errors"] else ""
+        http2 = f" ({s['http2']} multiplexed over HTTP/2)" if s["http2"] else ""
+        cached = f" | {s['cached']} from disk cache" if s["cached"] else ""
+        retries = f" | {s['retries']} retried ({s['throttled']} x 429)" if s["retries"] else ""
+        print(f"   {host:<28} {s['requests']:>4} requests{http2} | {s['connections']:>2} new keep-alive connections | {s['bytes'] / 1024:>7.0f} KB | {s['seconds']:.2f}s{cached}{retries}{errors}")
@@ -1,4 +1,6 @@
-import os, hashlib, requests, io, shutil, time
+import os, hashlib, shutil, time, base64, threading, tempfile
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 try:
     from PIL import Image
 except Exception:
@@ -9,7 +11,10 @@ try:
 except Exception:
     HAVE_IMAGEHASH = False
 
-from constants import SCRIPT_DIR, HEADERS
+from constants import SCRIPT_DIR
+from helpers import http_async, http_cache
+from helpers.parsers import find_all
+from helpers.drivers import read_network_log
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import StaleElementReferenceException
 
@@ -18,6 +23,18 @@ from selenium.common.exceptions import StaleElementReferenceException
 # ---------------------------
 # Image downloading / hashing
 # ---------------------------
+MAX_DOWNLOAD_WORKERS = 8   # parallel image downloads per listing
+DOWNLOADS_PER_HOST = 4     # default cap per host (CDNs throttle bursts); keep <= http_session.POOL_PER_HOST
+
+MAX_IMAGE_BYTES = 20 * 1024 * 1024  # refuse anything bigger (listing photos are a few hundred KB)
+CHUNK_SIZE = 64 * 1024              # downloads are streamed to disk in chunks of this size
+SPOOL_SIZE = 1024 * 1024            # in-memory hashing buffer before spilling to a temp file
+# First bytes of the formats PIL decodes (JPEG, PNG, GIF, BMP; WebP is RIFF....WEBP)
+IMAGE_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF87a", b"GIF89a", b"BM")
+
+_HOST_SLOTS: dict[str, threading.Semaphore] = {}
+_HOST_SLOTS_LOCK = threading.Lock()
+
 def extract_images_generic(driver, css_selector: str, filter_func=None, pre_extract_hook=None, marketplace: str = ""):
     """
     Generic image extractor that works for any marketplace.
@@ -70,6 +87,50 @@ def extract_images_generic(driver, css_selector: str, filter_func=None, pre_extr
     
     return images
 
+def extract_images_from_html(page: dict, spec: list, filter_func=None) -> list:
+    """
+    Extract image URLs from an already fetched page, so no browser is needed.
+    
+    Args:
+        page: Parsed page (helpers.parsers.parse_page)
+        spec: [tag, attribute, value] matching the image elements (value may be a callable)
+        filter_func: Optional function to filter images (takes src, returns bool)
+    
+    Returns:
+        List of image URLs, in page order, without duplicates
+    """
+    images, seen = [], set()
+    for img in find_all(page, spec):
+        src = img["attrs"].get("src") or img["attrs"].get("data-src")
+        if not src or src in seen:
+            continue
+        if filter_func and not filter_func(src):
+            continue
+        images.append(src)
+        seen.add(src)
+    return images
+
+def capture_image_bodies(driver, urls: list) -> dict[str, bytes]:
+    """
+    Get image bytes the browser has already received, via CDP Network.getResponseBody,
+    instead of downloading them again. URLs the browser never loaded (lazy images,
+    evicted buffers) are simply missing from the result.
+    """
+    request_ids = read_network_log(driver)["images"]
+    captured = {}
+    for url in urls:
+        request_id = request_ids.get(url)
+        if not request_id:
+            continue
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception:
+            continue
+        data = base64.b64decode(body["body"]) if body.get("base64Encoded") else body["body"].encode()
+        if data:
+            captured[url] = data
+    return captured
+
 def safe_download_image(url: str) -> str | None:
     """Download image to local temp folder, return absolute path or None if failed."""
     try:
@@ -78,7 +139,156 @@ def safe_download_image(url: str) -> str | None:
         print(f"⚠️ Failed to download {url[:50]}...: {e}")
         return None
 
-def download_image(url, folder="temp_images"):
+def ingest_image(url: str, data: bytes | None = None, folder="temp_images") -> dict | None:
+    """
+    Bring one image into the temp folder and describe it from the same bytes: fetched once
+    (or taken from data, e.g. captured from the browser, or from an earlier download), then
+    written to disk and hashed without a second request.
+    Returns {"url", "path", "size", "width", "height", "md5", "phash"}, or None if it failed.
+    """
+    path = image_path(url, folder)
+    try:
+        if data is not None:
+            check_image_response(None, len(data), data[:16])
+            if not os.path.exists(path):
+                _write_atomic(path, [data])
+            size, md5 = len(data), hashlib.md5(data).hexdigest()
+        elif os.path.exists(path):
+            size, md5 = _file_md5(path)
+        else:
+            size, md5 = stream_image(url, path)
+    except Exception as e:
+        print(f"⚠️ Failed to download {url[:50]}...: {e}")
+        return None
+
+    phash, width, height = _decode_image(path)
+    if "?" not in url:  # compute_image_hashes hashes the query-stripped URL, so only then is it the same image
+        _IMAGE_HASH_CACHE[url] = (md5, phash)  # later compute_image_hashes(url) calls are free
+    return {"url": url, "path": os.path.abspath(path), "size": size, "width": width, "height": height, "md5": md5, "phash": phash}
+
+def check_image_response(content_type: str | None, size: int | None, head: bytes | None = None):
+    """
+    Raise ValueError unless a response looks like an image of acceptable size. head is the
+    start of the body: it must have an image file signature, whatever the Content-Type says
+    (CDNs serve photos as application/octet-stream too).
+    """
+    if content_type and not content_type.lower().startswith(("image/", "application/octet-stream")):
+        raise ValueError(f"not an image ({content_type})")
+    if size and size > MAX_IMAGE_BYTES:
+        raise ValueError(f"image too large ({size // 1024} KB)")
+    if head is not None and not (head.startswith(IMAGE_SIGNATURES) or head[:4] == b"RIFF" and head[8:12] == b"WEBP"):
+        raise ValueError("not an image (unknown file signature)")
+
+def _check_download(headers, head: bytes):
+    """check_image_response for http_async.download_many: headers and the first chunk of the body."""
+    check_image_response(headers.get("Content-Type"), int(headers.get("Content-Length") or 0), head)
+
+def _write_atomic(path: str, chunks) -> tuple[int, str]:
+    """
+    Write chunks to path via a private .part file renamed into place once complete, so a
+    crash or error never leaves a half-written image behind. Returns (size, md5_hex).
+    """
+    part = f"{path}.{os.getpid()}-{threading.get_ident()}.part"
+    md5, size = hashlib.md5(), 0
+    try:
+        with open(part, "wb") as f:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise ValueError(f"image too large (> {MAX_IMAGE_BYTES // 1024} KB)")
+                md5.update(chunk)
+                f.write(chunk)
+        os.replace(part, path)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()  # release the streamed response right away
+    return size, md5.hexdigest()
+
+def _stream_chunks(url: str):
+    """Yield the body of an image URL in CHUNK_SIZE pieces, after checking its headers and file signature."""
+    with http_cache.get(url, "image", stream=True) as r:
+        r.raise_for_status()
+        chunks = r.iter_content(CHUNK_SIZE)
+        head = next(chunks, b"")
+        check_image_response(r.headers.get("Content-Type"), int(r.headers.get("Content-Length") or 0), head)
+        yield head
+        yield from chunks
+
+def stream_image(url: str, path: str) -> tuple[int, str]:
+    """Download url to path chunk by chunk, hashing as it arrives. Returns (size, md5_hex)."""
+    return _write_atomic(path, _stream_chunks(url))
+
+def _file_md5(path: str) -> tuple[int, str]:
+    md5, size = hashlib.md5(), 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            size += len(chunk)
+            md5.update(chunk)
+    return size, md5.hexdigest()
+
+def _host_slot(host: str, limits: dict | None) -> threading.Semaphore:
+    """Semaphore capping concurrent downloads from one host (shared by every call)."""
+    with _HOST_SLOTS_LOCK:
+        if host not in _HOST_SLOTS:
+            _HOST_SLOTS[host] = threading.Semaphore((limits or {}).get(host, DOWNLOADS_PER_HOST))
+        return _HOST_SLOTS[host]
+
+def ingest_images(urls: list, captured: dict | None = None, host_limits: dict | None = None) -> list[dict | None]:
+    """
+    ingest_image() for several images in parallel, at most DOWNLOADS_PER_HOST at a time per
+    host (overridable per host with host_limits, e.g. CONFIG["download_per_host"]).
+    Images in captured ({url: bytes}) are written straight from memory.
+    Returns records in the same order as urls, None where an image failed.
+    """
+    captured = captured or {}
+    if http_async.async_enabled():
+        return _ingest_images_async(urls, captured, host_limits)
+
+    def _one(url):
+        if url in captured:
+            return ingest_image(url, captured[url])
+        with _host_slot(urlsplit(url).hostname or "", host_limits):
+            return ingest_image(url)
+
+    if len(urls) <= 1:
+        return [_one(u) for u in urls]
+    with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(urls))) as pool:
+        return list(pool.map(_one, urls))  # map keeps the input order
+
+def _ingest_images_async(urls: list, captured: dict, host_limits: dict | None) -> list[dict | None]:
+    """
+    ingest_images over the async backend: all missing images requested at once (HTTP/2 when
+    available) and streamed straight to the temp folder, so memory stays at a chunk per request.
+    """
+    records = {u: ingest_image(u, captured[u]) for u in urls if u in captured}
+    # already on disk or fresh in the HTTP cache: no request needed
+    records.update({
+        u: ingest_image(u) for u in urls
+        if u not in records and (os.path.exists(image_path(u)) or http_cache.is_fresh(u, "image"))
+    })
+    pending = list(dict.fromkeys(u for u in urls if u not in records))
+
+    jobs = [(u, image_path(u)) for u in pending]
+    for (url, path), headers in zip(jobs, http_async.download_many(jobs, _check_download, MAX_IMAGE_BYTES, host_limits)):
+        if isinstance(headers, Exception):
+            print(f"⚠️ Failed to download {url[:50]}...: {headers}")
+            records[url] = None
+            continue
+        try:
+            http_cache.store_file(url, path, headers)
+        except (OSError, ValueError):
+            pass  # the image itself is on disk; only the cache copy is missing
+        records[url] = ingest_image(url)
+    return [records[u] for u in urls]
+
+def image_path(url: str, folder="temp_images") -> str:
+    """Local path an image URL is stored at in the temp folder (md5 of the URL + extension)."""
     folder_path = os.path.join(SCRIPT_DIR, folder)
     os.makedirs(folder_path, exist_ok=True)
     url_hash = hashlib.md5(url.encode()).hexdigest()
@@ -98,13 +308,13 @@ def download_image(url, folder="temp_images"):
         ext = "jpg"  # Default for URLs without extensions
     
     filename = f"{url_hash}.{ext}"
-    path = os.path.join(folder_path, filename)
+    return os.path.join(folder_path, filename)
+
+def download_image(url, folder="temp_images"):
+    path = image_path(url, folder)
     
     if not os.path.exists(path):
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        with open(path, "wb") as f:
-            f.write(response.content)
+        stream_image(url, path)
     return path
 
 # small in-memory cache to avoid repeated downloads of the same URL
@@ -131,29 +341,19 @@ def compute_image_hashes(url: str) -> tuple[str | None, str | None]:
 
         for u in tried_urls:
             try:
-                resp = requests.get(u, timeout=10, headers=HEADERS)
-                resp.raise_for_status()
-                b = resp.content
-                md5 = hashlib.md5(b).hexdigest()
-
-                phash_hex = None
-                if Image is not None:
-                    try:
-                        img = Image.open(io.BytesIO(b)).convert("RGB")
-                        if HAVE_IMAGEHASH:
-                            phash_hex = str(imagehash.phash(img))
-                        else:
-                            # fallback aHash (64-bit) using PIL only
-                            small = img.convert("L").resize((8, 8), Image.Resampling.LANCZOS)
-                            pixels = list(small.getdata())
-                            avg = sum(pixels) / len(pixels)
-                            bits = "".join("1" if p > avg else "0" for p in pixels)
-                            phash_hex = hex(int(bits, 2))[2:].rjust(16, "0")
-                    except Exception:
-                        phash_hex = None
-
-                _IMAGE_HASH_CACHE[url] = (md5, phash_hex)
-                return md5, phash_hex
+                # stream into a spooled buffer: small thumbnails stay in memory, big files spill to disk
+                with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as buf:
+                    md5, size = hashlib.md5(), 0
+                    for chunk in _stream_chunks(u):
+                        size += len(chunk)
+                        if size > MAX_IMAGE_BYTES:
+                            raise ValueError("image too large")
+                        md5.update(chunk)
+                        buf.write(chunk)
+                    buf.seek(0)
+                    phash_hex, _, _ = _decode_image(buf)
+                _IMAGE_HASH_CACHE[url] = (md5.hexdigest(), phash_hex)
+                return _IMAGE_HASH_CACHE[url]
             except Exception:
                 # try next candidate (e.g. stripped query)
                 continue
@@ -164,6 +364,55 @@ def compute_image_hashes(url: str) -> tuple[str | None, str | None]:
     _IMAGE_HASH_CACHE[url] = (None, None)
     return None, None
 
+def prefetch_image_hashes(urls: list):
+    """
+    Hash many candidate images (e.g. profile thumbnails) in one concurrent batch, so the
+    compute_image_hashes calls that follow are cache hits. Only done with the async backend;
+    URLs that fail here are retried one by one by compute_image_hashes.
+    """
+    if not http_async.async_enabled():
+        return
+    # same first attempt as compute_image_hashes; fresh disk-cache entries are left to it
+    pending = {
+        u: u.split("?", 1)[0] for u in urls
+        if u and u not in _IMAGE_HASH_CACHE and not http_cache.is_fresh(u.split("?", 1)[0], "image")
+    }
+    if not pending:
+        return
+    # streamed to a scratch folder, with the same type / size checks as the listing photos
+    with tempfile.TemporaryDirectory() as scratch:
+        jobs = [(fetch, os.path.join(scratch, hashlib.md5(fetch.encode()).hexdigest())) for fetch in pending.values()]
+        for url, (fetch, path), headers in zip(pending, jobs, http_async.download_many(jobs, _check_download, MAX_IMAGE_BYTES)):
+            if isinstance(headers, Exception):
+                continue
+            try:
+                http_cache.store_file(fetch, path, headers)
+                _IMAGE_HASH_CACHE[url] = (_file_md5(path)[1], _decode_image(path)[0])
+            except Exception:
+                pass
+
+def _decode_image(fp) -> tuple[str | None, int | None, int | None]:
+    """Return (phash_hex_or_none, width, height) for an image file path or file object."""
+    phash_hex = width = height = None
+    if Image is not None:
+        try:
+            with Image.open(fp) as src:  # closes the file handle (Windows keeps opened files locked)
+                width, height = src.size
+                img = src.convert("RGB")
+            if HAVE_IMAGEHASH:
+                phash_hex = str(imagehash.phash(img))
+            else:
+                # fallback aHash (64-bit) using PIL only
+                small = img.convert("L").resize((8, 8), Image.Resampling.LANCZOS)
+                pixels = list(small.getdata())
+                avg = sum(pixels) / len(pixels)
+                bits = "".join("1" if p > avg else "0" for p in pixels)
+                phash_hex = hex(int(bits, 2))[2:].rjust(16, "0")
+        except Exception:
+            phash_hex = None
+
+    return phash_hex, width, height
+
 def hamming_distance_hex(h1: str | None, h2: str | None) -> int:
     if not h1 or not h2:
         return 9999
@@ -0,0 +1,168 @@
+import os, time, sqlite3
+from contextlib import contextmanager
+
+from constants import SCRIPT_DIR
+from helpers.images import hamming_distance_hex
+from helpers.utils import is_match
+
+
+
+# ---------------------------
+# Local index of our own listings
+# ---------------------------
+# One SQLite file with every listing we have on each marketplace (URL, title, price, image
+# md5/phash of the first thumbnail), so checking whether a listing already exists is a local
+# query instead of scrolling the whole profile. The index is filled by the profile sync in
+# helpers/scraping.py, which only scrolls until it reaches listings that are already indexed,
+# and by upload_listing, which adds a "pending" row (no URL yet) until the next sync finds
+# the published listing. The uploader only fills the form, so a pending row is dropped by the
+# first complete sync that does not find it (never published), and ignored after PENDING_HOURS
+# anyway. Every FULL_SYNC_DAYS the whole profile is read again and listings that are gone
+# (sold, deleted) are dropped.
+INDEX_FILE = os.path.join(SCRIPT_DIR, "listings_index.sqlite")
+FULL_SYNC_DAYS = 7
+PENDING_HOURS = 24
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    marketplace TEXT NOT NULL,
+    url         TEXT,            -- NULL for an upload not yet seen on the profile
+    title       TEXT,
+    price       TEXT,
+    md5         TEXT,
+    phash       TEXT,
+    source_url  TEXT,            -- listing it was copied from (uploads only)
+    added       REAL NOT NULL,
+    seen        REAL,            -- last sync that found it on the profile
+    UNIQUE (marketplace, url)
+);
+CREATE INDEX IF NOT EXISTS listings_md5 ON listings (marketplace, md5);
+CREATE TABLE IF NOT EXISTS syncs (
+    marketplace TEXT PRIMARY KEY,
+    synced      REAL,
+    full_synced REAL
+);
+"""
+_READY = False
+
+
+@contextmanager
+def _db():
+    """Connection with the schema in place; commits on success. One per call, so any thread can use it."""
+    global _READY
+    conn = sqlite3.connect(INDEX_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            if not _READY:
+                conn.executescript(_SCHEMA)
+                _READY = True
+            yield conn
+    finally:
+        conn.close()
+
+def known_urls(marketplace: str) -> set[str]:
+    with _db() as conn:
+        rows = conn.execute("SELECT url FROM listings WHERE marketplace = ? AND url IS NOT NULL", (marketplace,))
+        return {row["url"] for row in rows}
+
+def needs_full_sync(marketplace: str) -> bool:
+    """True if the profile was never synced completely or not for FULL_SYNC_DAYS."""
+    with _db() as conn:
+        row = conn.execute("SELECT full_synced FROM syncs WHERE marketplace = ?", (marketplace,)).fetchone()
+    return not row or not row["full_synced"] or time.time() - row["full_synced"] > FULL_SYNC_DAYS * 86400
+
+def _is_same(pending: sqlite3.Row, item: dict) -> bool:
+    return bool(pending["md5"] and pending["md5"] == item.get("md5")) or is_match(pending["title"] or "", item.get("title") or "")
+
+def add_listings(marketplace: str, items: list[dict]):
+    """
+    Insert or refresh listings found on the profile ({"url", "title", "price", "md5", "phash"}).
+    Pending uploads that one of them matches are replaced by it.
+    """
+    now = time.time()
+    with _db() as conn:
+        pending = conn.execute("SELECT rowid, * FROM listings WHERE marketplace = ? AND url IS NULL", (marketplace,)).fetchall()
+        for item in items:
+            for row in pending:
+                if _is_same(row, item):
+                    conn.execute("DELETE FROM listings WHERE rowid = ?", (row["rowid"],))
+            conn.execute(
+                """INSERT INTO listings (marketplace, url, title, price, md5, phash, added, seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (marketplace, url) DO UPDATE SET
+                       title = excluded.title, seen = excluded.seen,
+                       price = COALESCE(excluded.price, price),
+                       md5 = COALESCE(excluded.md5, md5), phash = COALESCE(excluded.phash, phash)""",
+                (marketplace, item["url"], item.get("title"), item.get("price"), item.get("md5"), item.get("phash"), now, now),
+            )
+
+def finish_sync(marketplace: str, seen_urls: set, full: bool, started: float | None = None):
+    """
+    Record a sync. After a full one, listings that were not on the profile any more are dropped.
+    started is given for a sync that read every new listing (it was not cut short): pending
+    uploads from before it that it did not find were never published and are dropped too.
+    """
+    now = time.time()
+    with _db() as conn:
+        if started is not None:
+            conn.execute("DELETE FROM listings WHERE marketplace = ? AND url IS NULL AND added < ?", (marketplace, started))
+        conn.execute("DELETE FROM listings WHERE url IS NULL AND added < ?", (now - PENDING_HOURS * 3600,))
+        if full:
+            placeholders = ",".join("?" * len(seen_urls))
+            conn.execute(
+                f"DELETE FROM listings WHERE marketplace = ? AND url IS NOT NULL AND url NOT IN ({placeholders})",
+                (marketplace, *seen_urls),
+            )
+            conn.execute("UPDATE listings SET seen = ? WHERE marketplace = ? AND url IS NOT NULL", (now, marketplace))
+        conn.execute(
+            """INSERT INTO syncs (marketplace, synced, full_synced) VALUES (?, ?, ?)
+               ON CONFLICT (marketplace) DO UPDATE SET synced = excluded.synced,
+                   full_synced = COALESCE(excluded.full_synced, full_synced)""",
+            (marketplace, now, now if full else None),
+        )
+
+def add_upload(marketplace: str, listing: dict):
+    """Add a listing whose upload form was just filled in; it stays pending until a sync sees it or drops it."""
+    with _db() as conn:
+        conn.execute(
+            """INSERT INTO listings (marketplace, url, title, price, md5, phash, source_url, added)
+               VALUES (?, NULL, ?, ?, ?, ?, ?, ?)""",
+            (marketplace, listing.get("title"), listing.get("price"), listing.get("md5"), listing.get("phash"), listing.get("url"), time.time()),
+        )
+
+def match_listing(rows: list, listing: dict, hamming_thresh: int = 6) -> str | None:
+    """
+    Match a listing against index rows ({"url", "title", "md5", "phash"}, plus "added" for
+    pending uploads) by title first, then by image md5 / phash.
+    Returns the URL, a note for a pending upload, or None.
+    """
+    def _found(row, how):
+        if row["url"]:
+            print(f"✅ Match found by {how}: {row['url']}")
+            return row["url"]
+        uploaded = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["added"]))
+        print(f"✅ Match found by {how}: uploaded {uploaded}, not seen on the profile yet")
+        return f"uploaded {uploaded} (pending)"
+
+    for row in rows:
+        if row.get("title") and listing.get("title") and is_match(listing["title"], row["title"]):
+            return _found(row, "title")
+    for row in rows:
+        if listing.get("md5") and row.get("md5") == listing["md5"]:
+            return _found(row, "md5")
+    for row in rows:
+        if listing.get("phash") and row.get("phash"):
+            ham = hamming_distance_hex(listing["phash"], row["phash"])
+            if ham <= hamming_thresh:
+                return _found(row, f"perceptual hash (hamming={ham})")
+    return None
+
+def find_listing(marketplace: str, listing: dict, hamming_thresh: int = 6) -> str | None:
+    """Look a listing up among everything indexed for a marketplace (see match_listing); expired pending uploads are ignored."""
+    with _db() as conn:
+        rows = conn.execute(
+            "SELECT * FROM listings WHERE marketplace = ? AND (url IS NOT NULL OR added >= ?)",
+            (marketplace, time.time() - PENDING_HOURS * 3600),
+        ).fetchall()
+    return match_listing([dict(row) for row in rows], listing, hamming_thresh)
@@ -0,0 +1,158 @@
+from bs4 import BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAVE_SELECTOLAX = True
+except Exception:
+    HAVE_SELECTOLAX = False
+try:
+    import lxml.html
+    HAVE_LXML = True
+except Exception:
+    HAVE_LXML = False
+
+
+
+# ---------------------------
+# HTML parser backends
+# ---------------------------
+# Pages fetched over HTTP are parsed by one of these backends. Whatever the backend, lookups
+# return plain node dicts, so the col_* specs in each marketplace CONFIG work the same on all:
+#   {"tag": str, "attrs": {name: value}, "strings": [stripped text pieces], "own_text": str, "raw": str}
+# A spec is [tag, attribute, value] (value may be a callable, like soup.find), a
+# (By.CSS_SELECTOR, css) tuple, or a bare tag name.
+PARSER = "auto"   # "auto" = fastest installed, or one of PARSERS
+PARSER_ORDER = ("selectolax", "lxml", "bs4-lxml", "bs4")
+
+_TEXT_SEP = "\x00"
+
+
+def _attr_matches(name: str, actual, expected) -> bool:
+    """soup.find attribute semantics: class matches any of its tokens; callables get the value."""
+    if callable(expected):
+        if actual is None:
+            return bool(expected(None))
+        if name == "class":
+            return any(expected(tok) for tok in actual.split()) or bool(expected(actual))
+        return bool(expected(actual))
+    if actual is None:
+        return False
+    if name == "class":
+        return expected in actual.split() or expected == actual
+    return actual == expected
+
+def _filter(backend: dict, elements, attr_name, attr_val, limit) -> list[dict]:
+    """Test attributes on the native elements; node dicts are only built for the matches."""
+    found = []
+    for el in elements:
+        if attr_name is None or _attr_matches(attr_name, backend["attr"](el, attr_name), attr_val):
+            found.append(backend["node"](el))
+            if limit and len(found) >= limit:
+                break
+    return found
+
+
+# ---------- BeautifulSoup (html.parser / lxml tree builder) ----------
+def _bs4_node(el) -> dict:
+    attrs = {k: " ".join(v) if isinstance(v, list) else v for k, v in el.attrs.items()}
+    return {
+        "tag": el.name,
+        "attrs": attrs,
+        "strings": list(el.stripped_strings),
+        "own_text": "".join(el.find_all(string=True, recursive=False)).strip(),
+        "raw": el.string or el.get_text(),
+    }
+
+def _bs4_attr(el, name):
+    value = el.attrs.get(name)
+    return " ".join(value) if isinstance(value, list) else value
+
+def _bs4_select(root, css, limit):
+    return [_bs4_node(el) for el in root.select(css, limit=limit or 0)]
+
+
+# ---------- lxml ----------
+def _lxml_node(el) -> dict:
+    attrs = dict(el.attrib)
+    own = (el.text or "") + "".join(child.tail or "" for child in el)
+    return {
+        "tag": el.tag,
+        "attrs": attrs,
+        "strings": [t.strip() for t in el.itertext() if t.strip()],
+        "own_text": own.strip(),
+        "raw": el.text_content(),
+    }
+
+def _lxml_select(root, css, limit):
+    nodes = [_lxml_node(el) for el in root.cssselect(css)]  # needs the cssselect package
+    return nodes[:limit] if limit else nodes
+
+
+# ---------- selectolax (lexbor engine) ----------
+def _selectolax_node(el) -> dict:
+    return {
+        "tag": el.tag,
+        "attrs": dict(el.attributes),
+        "strings": [t.strip() for t in (el.text(deep=True, separator=_TEXT_SEP) or "").split(_TEXT_SEP) if t.strip()],
+        "own_text": (el.text(deep=False) or "").strip(),
+        "raw": el.text(deep=True) or "",
+    }
+
+def _selectolax_select(root, css, limit):
+    nodes = root.css(css)
+    return [_selectolax_node(el) for el in (nodes[:limit] if limit else nodes)]
+
+
+PARSERS = {  # parse(html) -> root | iter(root, tag) -> elements | attr(el, name) | node(el) -> node dict | select(root, css, limit)
+    "bs4": {
+        "parse": lambda html: BeautifulSoup(html, "html.parser"),
+        "iter": lambda root, tag: root.find_all(tag or True),
+        "attr": _bs4_attr, "node": _bs4_node, "select": _bs4_select,
+    },
+    "bs4-lxml": {
+        "parse": lambda html: BeautifulSoup(html, "lxml"),
+        "iter": lambda root, tag: root.find_all(tag or True),
+        "attr": _bs4_attr, "node": _bs4_node, "select": _bs4_select,
+    },
+    "lxml": {
+        "parse": lambda html: lxml.html.fromstring(html),
+        "iter": lambda root, tag: root.iter(tag or lxml.html.etree.Element),
+        "attr": lambda el, name: el.get(name), "node": _lxml_node, "select": _lxml_select,
+    },
+    "selectolax": {
+        "parse": lambda html: LexborHTMLParser(html),
+        "iter": lambda root, tag: root.css(tag or "*"),
+        "attr": lambda el, name: el.attributes.get(name), "node": _selectolax_node, "select": _selectolax_select,
+    },
+}
+_AVAILABLE = {"bs4": True, "bs4-lxml": HAVE_LXML, "lxml": HAVE_LXML, "selectolax": HAVE_SELECTOLAX}
+
+
+def available_parsers() -> list[str]:
+    return [name for name in PARSER_ORDER if _AVAILABLE[name]]
+
+def parse_page(html: str, parser: str | None = None) -> dict:
+    """Parse HTML with the given backend (default PARSER). Returns a page for find / find_all."""
+    name = parser or PARSER
+    if name == "auto":
+        name = available_parsers()[0]
+    if not _AVAILABLE.get(name):
+        raise ValueError(f"HTML parser not available: {name}")
+    return {"parser": name, "root": PARSERS[name]["parse"](html)}
+
+def find_all(page: dict, spec, limit: int | None = None) -> list[dict]:
+    """Return the nodes matching a spec (see the top of this module), in document order."""
+    backend = PARSERS[page["parser"]]
+    if isinstance(spec, tuple):  # (By.CSS_SELECTOR, css)
+        return backend["select"](page["root"], spec[1], limit)
+    if isinstance(spec, str):
+        spec = [spec, None, None]
+    tag_name, attr_name, attr_val = spec
+    return _filter(backend, backend["iter"](page["root"], tag_name), attr_name, attr_val, limit)
+
+def find(page: dict, spec) -> dict | None:
+    nodes = find_all(page, spec, limit=1)
+    return nodes[0] if nodes else None
+
+def node_text(node: dict | None, sep: str = "") -> str | None:
+    """Text of a node with each piece stripped, like soup's get_text(sep, strip=True)."""
+    return sep.join(node["strings"]) if node else None
@@ -1,7 +1,12 @@
+import time, threading
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from constants import MARKETPLACES, REQUIRED_FIELDS
-from helpers.abort import check_abort
+from helpers.abort import check_abort, start_worker, end_worker
+from helpers.cookies import LoginRequired
+from helpers import index
+from helpers.scraping import check_listing_existence_multi
 
 
 
@@ -48,10 +53,14 @@ def collect_listing(url: str, source: str) -> dict:
 # ---------------------------
 # Checker
 # ---------------------------
+CHECK_MODE = "concurrent"  # "concurrent": one checker per worker thread | "multi_window": one browser, one window per marketplace | "sequential"
+CHECK_DEADLINE = 180  # seconds for the whole check in "concurrent" mode; unfinished checkers are skipped
+
 def check_existing_in_other_marketplaces(listing: dict):
     """Check if listing exists in other marketplaces using registered checker functions."""
     source = listing.get("source")
     
+    targets = {}
     for marketplace, marketplace_data in MARKETPLACES.items():
         if marketplace == source:
             continue
@@ -60,18 +69,89 @@ def check_existing_in_other_marketplaces(listing: dict):
         if not checker:
             print(f"⚠️ Checker not implemented for {marketplace.capitalize()}, skipping...")
             continue
-        
-        found_url = checker(listing)
+        targets[marketplace] = marketplace_data
+
+    # All marketplaces at once in a shared browser; anything it could not check falls back below
+    if CHECK_MODE == "multi_window":
+        configs = {m: data["config"] for m, data in targets.items() if data.get("config")}
+        results = check_listing_existence_multi(listing, configs)
+        if results is None:  # aborted
+            return None
+        for marketplace, found_url in results.items():
+            _record_existence(listing, marketplace, found_url)
+            targets.pop(marketplace, None)
+
+    # Every checker in its own worker, results recorded as they come in
+    if CHECK_MODE == "concurrent":
+        return _check_concurrently(listing, targets)
+
+    for marketplace, marketplace_data in targets.items():
+        found_url = marketplace_data["checker"](listing)
         
         if check_abort():
             return None
         
-        if found_url:
-            listing["exists_in"][marketplace] = found_url
-            print(f"✅ Already exists on {marketplace.capitalize()}: {found_url}")
-        else:
-            listing["exists_in"][marketplace] = None
-            print(f"❌ Not found on {marketplace.capitalize()}")
+        _record_existence(listing, marketplace, found_url)
+
+def _check_concurrently(listing: dict, targets: dict, deadline: float | None = None):
+    """
+    Run the checkers at the same time (each borrows its own pooled driver), so the step takes
+    as long as the slowest one. Checkers still running at the deadline are told to stop through
+    check_abort and left out of listing["exists_in"]. Workers never prompt: marketplaces that
+    need a manual login are checked afterwards, one by one, on this thread. Returns None if aborted.
+    """
+    if not targets:
+        return
+    deadline = deadline or time.monotonic() + CHECK_DEADLINE
+    cancel = threading.Event()  # stops every worker at its next check_abort (ESC, deadline, early return)
+    needs_login = []
+
+    def _run(checker):
+        start_worker(deadline, cancel)
+        try:
+            return checker(listing)
+        finally:
+            end_worker()
+
+    executor = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="check")
+    try:
+        pending = {executor.submit(_run, data["checker"]): m for m, data in targets.items()}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for marketplace in pending.values():
+                    print(f"⏱️ {marketplace.capitalize()} check did not finish within {CHECK_DEADLINE}s, skipped")
+                break
+            done, _ = wait(pending, timeout=min(remaining, 0.5), return_when=FIRST_COMPLETED)
+            if check_abort():
+                return None
+            for future in done:
+                marketplace = pending.pop(future)
+                try:
+                    found_url = future.result()
+                except LoginRequired:
+                    needs_login.append(marketplace)
+                    continue
+                except Exception as e:
+                    print(f"⚠️ {marketplace.capitalize()} check error: {e}")
+                    continue
+                if found_url is None and time.monotonic() >= deadline:  # stopped by the deadline, not a real "not found"
+                    print(f"⏱️ {marketplace.capitalize()} check did not finish within {CHECK_DEADLINE}s, skipped")
+                    continue
+                _record_existence(listing, marketplace, found_url)
+    finally:
+        # never wait for stragglers: the event stops them at their next check_abort, even after
+        # the global abort flag has been reset, and they return their driver on the way out
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # manual logins (input() prompts) only ever happen here, on the main thread, one at a time
+    for marketplace in needs_login:
+        print(f"🔑 {marketplace.capitalize()} needs a manual login, checking it now...")
+        found_url = targets[marketplace]["checker"](listing)
+        if check_abort():
+            return None
+        _record_existence(listing, marketplace, found_url)
 
 
 # ---------------------------
@@ -126,9 +206,20 @@ def upload_listing(listing: dict, destination: str):
         print(f"❌ Uploader not implemented for {destination.capitalize()}")
         return None
     
-    return uploader(listing)
+    driver = uploader(listing)
+    if driver:
+        index.add_upload(destination, listing)  # found by the next existence check, before the profile sync sees it
+    return driver
+
 
 
+def _record_existence(listing: dict, marketplace: str, found_url: str | None):
+    """Store a check result in listing["exists_in"] and report it."""
+    listing["exists_in"][marketplace] = found_url
+    if found_url:
+        print(f"✅ Already exists on {marketplace.capitalize()}: {found_url}")
+    else:
+        print(f"❌ Not found on {marketplace.capitalize()}")
 
 def _empty_listing(url: str, source: str | None) -> dict:
     """Return an empty listing structure."""
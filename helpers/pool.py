@@ -0,0 +1,138 @@
+import time, threading
+
+from helpers.drivers import headless_driver, visible_driver, undetected_driver, set_resource_blocking, reset_network_log
+from helpers.profiles import golden_profile, clone_profile, release_profile
+
+
+
+# ---------------------------
+# Driver pool
+# ---------------------------
+# Warm drivers are kept alive between runs of the main loop, keyed by
+# (kind, marketplace), so a listing does not pay a cold Chrome start for
+# every collect / check / upload step.
+POOL_MAX_IDLE = 300  # seconds an idle driver is kept before eviction
+POOL_MAX_PER_KEY = 2  # idle drivers kept per (kind, marketplace)
+
+DRIVER_FACTORIES = {
+    "headless": headless_driver,
+    "visible": visible_driver,
+    "undetected": undetected_driver,
+}
+
+_POOL: dict[tuple[str, str], list[tuple[object, float]]] = {}  # idle drivers with last check-in time
+_LOCK = threading.RLock()
+
+
+def is_driver_alive(driver) -> bool:
+    """Health check: a driver is usable if the browser still answers and has a window open."""
+    try:
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+    release_profile(getattr(driver, "_profile_dir", None))
+
+def launch_driver(kind: str, marketplace: str):
+    """
+    Start a new pool-owned driver with its own Chrome profile. Visible (upload / login) drivers use the
+    marketplace's golden profile; headless and undetected ones get a private clone of it,
+    so several can run at once.
+    """
+    profile_dir = golden_profile(marketplace) if kind == "visible" else clone_profile(marketplace)
+    try:
+        driver = DRIVER_FACTORIES[kind](profile_dir=profile_dir)
+    except Exception:
+        release_profile(profile_dir)
+        raise
+    driver._profile_dir = profile_dir
+    driver._pool_key = (kind, marketplace)
+    return driver
+
+def evict_idle(max_idle: float = POOL_MAX_IDLE, key: tuple = None):
+    """Quit idle drivers older than max_idle seconds (or every idle driver under the given key)."""
+    now = time.time()
+    to_quit = []
+    with _LOCK:
+        for pool_key, entries in _POOL.items():
+            keep = []
+            for driver, last_used in entries:
+                if pool_key == key or now - last_used > max_idle:
+                    to_quit.append(driver)
+                else:
+                    keep.append((driver, last_used))
+            _POOL[pool_key] = keep
+
+    for driver in to_quit:
+        _quit(driver)
+
+def _prepare(driver, blocked_urls: list | None):
+    """Reset per-borrow state: resource blocking and the performance log used for stats."""
+    if blocked_urls or getattr(driver, "_blocked_urls", None):
+        set_resource_blocking(driver, blocked_urls)
+    driver._blocked_urls = list(blocked_urls or [])
+    reset_network_log(driver)  # drop log entries from the previous borrower
+    return driver
+
+def checkout_driver(kind: str, marketplace: str, blocked_urls: list | None = None):
+    """
+    Borrow a warm driver of the given kind for a marketplace, launching one if none is idle.
+    Idle drivers are health-checked before being handed out. Must be returned with checkin_driver().
+    blocked_urls: URL patterns to block for this borrow (collect / check); None for uploads.
+    """
+    if kind not in DRIVER_FACTORIES:
+        raise ValueError(f"Unknown driver kind: {kind}")
+
+    evict_idle()
+    key = (kind, marketplace)
+
+    while True:
+        with _LOCK:
+            entries = _POOL.get(key) or []
+            if not entries:
+                break
+            driver, _ = entries.pop()
+        if is_driver_alive(driver):
+            print(f"♻️ Reusing warm {kind} driver for {marketplace.capitalize()}")
+            return _prepare(driver, blocked_urls)
+        _quit(driver)
+
+    driver = launch_driver(kind, marketplace)
+    return _prepare(driver, blocked_urls)
+
+def checkin_driver(driver):
+    """Return a borrowed driver to the pool. Dead or unknown drivers are quit instead."""
+    if driver is None:
+        return
+
+    key = getattr(driver, "_pool_key", None)
+    if key is None or not is_driver_alive(driver):
+        _quit(driver)
+        return
+
+    with _LOCK:
+        entries = _POOL.setdefault(key, [])
+        if len(entries) < POOL_MAX_PER_KEY:
+            entries.append((driver, time.time()))
+            return
+    _quit(driver)
+
+def discard_driver(driver):
+    """Quit a borrowed driver without returning it to the pool (e.g. after a crash)."""
+    if driver is not None:
+        _quit(driver)
+
+def close_pool():
+    """Quit every idle driver. Called once when the tool exits."""
+    with _LOCK:
+        drivers = [d for entries in _POOL.values() for d, _ in entries]
+        _POOL.clear()
+    for driver in drivers:
+        _quit(driver)
+    if drivers:
+        print(f"🧹 Closed {len(drivers)} pooled driver(s)")
@@ -0,0 +1,118 @@
+import os, sys, shutil, atexit, itertools, threading, subprocess, time
+
+from constants import SCRIPT_DIR
+
+
+
+# ---------------------------
+# Chrome profile manager
+# ---------------------------
+# profiles/<marketplace>/golden         -> long-lived profile holding the login session (visible drivers)
+# profiles/<marketplace>/workers/<id>   -> throwaway clone per headless / undetected driver
+PROFILES_DIR = os.path.join(SCRIPT_DIR, "profiles")
+
+# Not worth cloning: caches are rebuilt on demand and Singleton* files lock the profile to one process
+SKIP_NAMES = {
+    "Cache", "Code Cache", "GPUCache", "ShaderCache", "GrShaderCache", "DawnCache", "DawnGraphiteCache",
+    "DawnWebGPUCache", "CacheStorage", "ScriptCache", "Crashpad", "BrowserMetrics", "component_crx_cache",
+    "optimization_guide_model_store", "SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile",
+}
+# Files Chrome never rewrites in place (LevelDB tables are write-once), so a hard link is safe
+HARDLINK_EXTENSIONS = (".ldb", ".sst")
+
+_ACTIVE: set[str] = set()  # worker profiles created by this process
+_COUNTER = itertools.count(1)
+_LOCK = threading.Lock()
+
+
+def golden_profile(marketplace: str) -> str:
+    """Return (and create) the golden profile directory of a marketplace."""
+    path = os.path.join(PROFILES_DIR, marketplace, "golden")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _workers_dir(marketplace: str) -> str:
+    return os.path.join(PROFILES_DIR, marketplace, "workers")
+
+def _clone_file(src: str, dst: str):
+    """Hard-link write-once files, copy everything else. Files locked by a running Chrome are skipped."""
+    try:
+        if src.endswith(HARDLINK_EXTENSIONS):
+            try:
+                os.link(src, dst)
+                return dst
+            except OSError:
+                pass  # different filesystem / no link support: fall back to a copy
+        return shutil.copy2(src, dst)
+    except OSError as e:
+        print(f"⚠️ Skipped profile file {os.path.basename(src)}: {e}")
+        return dst
+
+def clone_profile(marketplace: str) -> str:
+    """Create a private profile for one driver, cloned from the marketplace's golden profile."""
+    with _LOCK:
+        worker_id = f"{os.getpid()}-{next(_COUNTER)}"
+    dest = os.path.join(_workers_dir(marketplace), worker_id)
+    shutil.rmtree(dest, ignore_errors=True)
+
+    shutil.copytree(
+        golden_profile(marketplace),
+        dest,
+        ignore=lambda _dir, names: [n for n in names if n in SKIP_NAMES],
+        copy_function=_clone_file,
+        symlinks=True,
+    )
+    with _LOCK:
+        _ACTIVE.add(dest)
+    return dest
+
+def release_profile(path: str | None, retries: int = 5, delay: float = 0.25):
+    """Delete a worker profile once its driver has quit. Golden profiles are never touched."""
+    if not path:
+        return
+    with _LOCK:
+        if path not in _ACTIVE:
+            return
+        _ACTIVE.discard(path)
+
+    for _ in range(retries):  # Chrome can hold files for a moment after quit (Windows)
+        shutil.rmtree(path, ignore_errors=True)
+        if not os.path.exists(path):
+            return
+        time.sleep(delay)
+
+def _pid_alive(pid: int) -> bool:
+    if sys.platform == "win32":
+        try:
+            out = subprocess.run(["tasklist", "/FI", f"PID eq {pid}", "/NH"], capture_output=True, text=True, timeout=10).stdout
+            return str(pid) in out
+        except Exception:
+            return True  # when unsure, keep the profile
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def gc_profiles():
+    """Remove worker profiles left behind by processes that are no longer running."""
+    if not os.path.isdir(PROFILES_DIR):
+        return
+    for marketplace in os.listdir(PROFILES_DIR):
+        workers = _workers_dir(marketplace)
+        if not os.path.isdir(workers):
+            continue
+        for worker_id in os.listdir(workers):
+            try:
+                pid = int(worker_id.split("-", 1)[0])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                shutil.rmtree(os.path.join(workers, worker_id), ignore_errors=True)
+
+@atexit.register
+def _release_all():
+    for path in list(_ACTIVE):
+        release_profile(path)
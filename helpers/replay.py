@@ -0,0 +1,138 @@
+import os, re, json, time, hashlib, threading
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from constants import SCRIPT_DIR, MARKETPLACES
+
+
+
+# ---------------------------
+# Recorded pages (fixtures)
+# ---------------------------
+# Listing and profile pages saved to disk so collection can be measured and re-run offline:
+#   fixtures/<marketplace>/<kind>-<sha1 of url>.html   (kind = "listing" | "profile")
+#   fixtures/<marketplace>/index.json                  {url: {"file", "kind", "source", "recorded"}}
+# "source" is "http" for a raw response body and "driver" for the DOM of a rendered page.
+# Pages are recorded with `python benchmark.py record URL...`, or during a normal run with
+# RECORD_FIXTURES = True.
+FIXTURES_DIR = os.path.join(SCRIPT_DIR, "fixtures")
+RECORD_FIXTURES = False
+
+_REPLAY = False
+_LOCK = threading.Lock()
+
+
+def marketplace_of(url: str) -> str | None:
+    for name, data in MARKETPLACES.items():
+        if any(p in url for p in data["patterns"]):
+            return name
+    return None
+
+def _index_path(marketplace: str) -> str:
+    return os.path.join(FIXTURES_DIR, marketplace, "index.json")
+
+def _load_index(marketplace: str) -> dict:
+    try:
+        with open(_index_path(marketplace), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_fixture(url: str, html: str, kind: str, source: str = "http") -> str | None:
+    """Store a page under fixtures/<marketplace>/ and add it to the index. Returns the file path."""
+    marketplace = marketplace_of(url)
+    if not marketplace or not html:
+        return None
+    name = f"{kind}-{hashlib.sha1(url.encode()).hexdigest()[:16]}.html"
+    path = os.path.join(FIXTURES_DIR, marketplace, name)
+    with _LOCK:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        index = _load_index(marketplace)
+        index[url] = {"file": name, "kind": kind, "source": source, "recorded": time.strftime("%Y-%m-%d %H:%M:%S")}
+        with open(_index_path(marketplace), "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+    print(f"💾 Recorded {kind} page: {os.path.relpath(path, SCRIPT_DIR)}")
+    return path
+
+def record_page(url: str, html: str, kind: str, source: str = "http"):
+    """Hook for the collectors: save the page only when RECORD_FIXTURES is on (never while replaying)."""
+    if RECORD_FIXTURES and not _REPLAY:
+        try:
+            save_fixture(url, html, kind, source)
+        except OSError as e:
+            print(f"⚠️ Could not record {url}: {e}")
+
+def fixtures(marketplace: str | None = None, kind: str | None = None) -> list[dict]:
+    """Recorded pages as [{"url", "marketplace", "path", "kind", "source"}], optionally filtered."""
+    found = []
+    for name in ([marketplace] if marketplace else MARKETPLACES):
+        for url, meta in _load_index(name).items():
+            if kind is None or meta["kind"] == kind:
+                found.append({
+                    "url": url, "marketplace": name, "kind": meta["kind"], "source": meta.get("source", "http"),
+                    "path": os.path.join(FIXTURES_DIR, name, meta["file"]),
+                })
+    return found
+
+def fixture_path(url: str) -> str | None:
+    marketplace = marketplace_of(url)
+    meta = _load_index(marketplace).get(url) if marketplace else None
+    return os.path.join(FIXTURES_DIR, marketplace, meta["file"]) if meta else None
+
+
+# ---------------------------
+# Replay
+# ---------------------------
+# While replaying, every HTTP request is answered from the fixtures (404 when the URL was not
+# recorded, nothing goes to the network) and navigate() opens the recorded file instead of
+# the live page. Script tags are stripped from the copy given to the browser, so the recorded
+# DOM is shown as it was captured instead of being re-rendered by the site's JS.
+_SCRIPT_RE = re.compile(
+    r"<script\b(?![^>]*type=[\"']application/(?:ld\+)?json[\"'])[^>]*>.*?</script\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def enable_replay(on: bool = True):
+    global _REPLAY
+    _REPLAY = on
+
+def replaying() -> bool:
+    return _REPLAY
+
+def replay_response(url: str) -> requests.Response:
+    """The recorded page as a 200 response, or an empty 404 if the URL has no fixture."""
+    r = requests.Response()
+    r.url = url
+    path = fixture_path(url)
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            r._content = f.read()
+        r.status_code = 200
+        r.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8", "Content-Length": str(len(r._content))})
+        r.encoding = "utf-8"
+    else:
+        r._content = b""
+        r.status_code = 404
+        r.headers = CaseInsensitiveDict({"Content-Length": "0"})
+    return r
+
+def driver_url(url: str) -> str:
+    """URL the browser should open: a script-free copy of the fixture while replaying, else url itself."""
+    if not _REPLAY:
+        return url
+    path = fixture_path(url)
+    if not path or not os.path.exists(path):
+        print(f"⚠️ No recorded page for {url}")
+        return "about:blank"
+    static = f"{path[:-len('.html')]}.static.html"
+    if not os.path.exists(static) or os.path.getmtime(static) < os.path.getmtime(path):
+        with open(path, "r", encoding="utf-8") as f:
+            html = _SCRIPT_RE.sub("", f.read())
+        with open(static, "w", encoding="utf-8") as f:
+            f.write(html)
+    return Path(static).as_uri()
@@ -1,21 +1,30 @@
-import os, time, re, requests
-from bs4 import BeautifulSoup
+import os, time, re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import StaleElementReferenceException
 
-from constants import HEADERS
-from helpers.drivers import undetected_driver, headless_driver, visible_driver
-from helpers.cookies import ensure_logged_in, try_accept_cookies
-from helpers.abort import check_abort
-from helpers.images import safe_download_image, download_image, compute_image_hashes, hamming_distance_hex
-from helpers.utils import is_match, scroll_to_load_all_items
+from helpers.drivers import scraping_block_list, set_resource_blocking, enable_body_capture
+from helpers.pool import checkout_driver, checkin_driver
+from helpers.stats import record, record_page_load
+from helpers.cookies import ensure_logged_in, try_accept_cookies, save_clearance, load_clearance, LoginRequired
+from helpers.abort import check_abort, in_worker
+from helpers.images import compute_image_hashes, extract_images_from_html
+from helpers.images import capture_image_bodies, ingest_images, prefetch_image_hashes
+from helpers.embedded import extract_embedded_listing
+from helpers.parsers import parse_page, find, node_text
+from helpers import http_cache, index
+from helpers.replay import record_page
+from helpers.utils import navigate, scroll_rounds
+from helpers.waits import wait_until, page_grew
 
 
 # ---------------------------
 # Collecting
 # ---------------------------
+# Text of anti-bot interstitials (e.g. the "Pardon Our Interruption" page saved in error_page_source.html)
+CHALLENGE_MARKERS = ["Pardon Our Interruption", "_Incapsula_Resource", "captcha-delivery.com", "cf-chl-"]
+
 
 def collect_listing_generic(url: str, marketplace: str, config: dict) -> dict | None:
     """
@@ -38,11 +47,29 @@ def collect_listing_generic(url: str, marketplace: str, config: dict) -> dict |
     driver = None
     try:
         # ---------- DETAILS ----------
-        if config.get("use_driver_for_details"):
-            driver = undetected_driver()
-            result = collect_listing_details_driver(driver, url, marketplace, config)
-        else:
-            result = collect_listing_details_http(url, marketplace, config)
+        # Tiers are tried in order: "http" (plain fetch, no browser) then a browser tier
+        page = embedded = result = None
+        tiers = collect_tiers(config)
+        for tier in tiers:
+            if check_abort():
+                return None
+            if tier == "http":
+                page = fetch_listing_page(url, marketplace, config)  # single fetch, shared by details and images
+                if page is None:
+                    continue  # challenged or failed: escalate
+                embedded = extract_embedded_listing(page, config.get("col_json"), config.get("col_image_filter"))
+                result = collect_listing_details_http(url, marketplace, config, page=page, embedded=embedded)
+                if result and all(result) or tier == tiers[-1]:
+                    break
+                print("⚠️ Incomplete details over HTTP, escalating to the browser")
+                page = embedded = None
+            else:
+                driver = _checkout_collect_driver(tier, marketplace, config)
+                result = collect_listing_details_driver(driver, url, marketplace, config)
+                if result and all(result) and "http" in tiers:
+                    save_clearance(driver, marketplace)  # lets the next HTTP attempt through
+                break
+        record("tier", marketplace, tier=tier, ok=bool(result and all(result)))
 
         if result is None: # aborted
             return None
@@ -60,7 +87,7 @@ def collect_listing_generic(url: str, marketplace: str, config: dict) -> dict |
         if check_abort():
             return None
 
-        result = collect_listing_images(url, marketplace, config, driver=driver)
+        result = collect_listing_images(url, marketplace, config, driver=driver, page=page, embedded=embedded)
         if result is None:
             return None
 
@@ -76,53 +103,100 @@ def collect_listing_generic(url: str, marketplace: str, config: dict) -> dict |
         return listing
 
     finally:
-        if driver and config.get("use_driver_for_details"):
-            try:
-                driver.quit()
-            except Exception:
-                pass
-
-def collect_listing_details_http(url: str, marketplace: str, config: dict) -> tuple[str, str, str] | None:
+        if driver:
+            checkin_driver(driver)
+
+def collect_tiers(config: dict) -> list[str]:
+    """Collection tiers of a marketplace: CONFIG "collect_tiers", else derived from use_driver_for_details."""
+    return config.get("collect_tiers") or (["undetected"] if config.get("use_driver_for_details") else ["http"])
+
+def is_challenge_page(r, config: dict) -> bool:
+    """True if a response is an anti-bot interstitial rather than the listing."""
+    if r.status_code in (403, 429, 503):
+        return True
+    markers = config.get("challenge_markers") or CHALLENGE_MARKERS
+    head = r.text[:50000]
+    return any(marker in head for marker in markers)
+
+def _checkout_collect_driver(kind: str, marketplace: str, config: dict):
+    """Borrow a driver for collection. Images are left unblocked when their bodies are to be captured."""
+    capture = bool(config.get("col_capture_images"))
+    driver = checkout_driver(kind, marketplace, blocked_urls=scraping_block_list(config, images=not capture))
+    if capture:
+        enable_body_capture(driver)
+    return driver
+
+def fetch_listing_page(url: str, marketplace: str, config: dict | None = None) -> dict | None:
     """
-    Scrape title, price, and description from a URL using BeautifulSoup.
-    Returns (title, price, description) tuple, or None if aborted/failed.
+    Fetch a listing page over HTTP and parse it (helpers/parsers.py). The clearance saved from
+    an earlier browser session (cookies + user agent) is sent along when there is one.
+    Returns None if aborted/failed or if the response is an anti-bot challenge.
     """
     if check_abort():
         return None
 
     try:
-        r = requests.get(url, headers=HEADERS, timeout=10)
+        headers = cookies = None
+        clearance = load_clearance(marketplace)
+        if clearance:
+            headers = {"User-Agent": clearance["user_agent"]}
+            cookies = {c["name"]: c["value"] for c in clearance["cookies"]}
+        r = http_cache.get(url, "page", headers=headers, cookies=cookies)
+        if is_challenge_page(r, config or {}):
+            http_cache.forget(url)
+            print(f"🛡️ {marketplace.capitalize()} answered with an anti-bot challenge ({r.status_code})")
+            return None
         if r.status_code != 200:
             print(f"❌ Error loading {marketplace.capitalize()} page: {r.status_code}")
             return None
-        soup = BeautifulSoup(r.text, "html.parser")
+        record_page(url, r.text, "listing")
+        return parse_page(r.text)
+    except Exception as e:
+        print(f"⚠️ Error loading {marketplace.capitalize()} page: {e}")
+        return None
 
-        # Title
-        title_tag = soup.find(config["col_title"][0], {config["col_title"][1]: config["col_title"][2]}) if isinstance(config["col_title"], list) else None
-        title = ''.join(title_tag.find_all(string=True, recursive=False)).strip() if title_tag else None
+def collect_listing_details_http(url: str, marketplace: str, config: dict, page: dict = None, embedded: dict = None) -> tuple[str, str, str] | None:
+    """
+    Scrape title, price, and description from a URL without a browser.
+    The page's embedded JSON (CONFIG "col_json") is read first; HTML selectors are only
+    used for fields it does not contain.
+    Pass an already fetched page (and its embedded data) to avoid loading it again.
+    Returns (title, price, description) tuple, or None if aborted/failed.
+    """
+    if page is None:
+        page = fetch_listing_page(url, marketplace)
+    if page is None:
+        return None
+
+    try:
+        if embedded is None:
+            embedded = extract_embedded_listing(page, config.get("col_json"), config.get("col_image_filter"))
+        if all(embedded.get(k) for k in ("title", "price", "description")):
+            title, price, description = embedded["title"], embedded["price"], embedded["description"]
+            print("⚡ Details read from the page's embedded JSON")
+            print(f'\n---\nTitle: {title}\nPrice: {price}\nDescription: {description}\n---')
+            return title, price, description
+
+
+        # Title (own text only, child elements such as badges are skipped)
+        title_tag = find(page, config["col_title"])
+        title = (title_tag["own_text"] or node_text(title_tag, " ")) if title_tag else None
         # Price
-        if isinstance(config["col_price"], list):
-            tag_name, attr_name, attr_val = config["col_price"]
-            if config["col_price_filter"]:
-                price_tag = soup.find(tag_name, {attr_name: config["col_price_filter"]})
-            else:
-                price_tag = soup.find(tag_name, {attr_name: attr_val})
-            price = price_tag.get_text(strip=True) if price_tag else None
+        if isinstance(config["col_price"], list) and config["col_price_filter"]:
+            tag_name, attr_name, _ = config["col_price"]
+            price_tag = find(page, [tag_name, attr_name, config["col_price_filter"]])
         else:
-            price_tag = soup.find(config["col_price"])
-            price = price_tag.get_text(strip=True) if price_tag else None
+            price_tag = find(page, config["col_price"])
+        price = node_text(price_tag)
 
         # Description
-        if isinstance(config["col_description"], list):
-            tag_name, attr_name, attr_val = config["col_description"]
-            desc_tag = soup.find(tag_name, {attr_name: attr_val})
-            if desc_tag:
-                description = desc_tag.get("content") or desc_tag.get_text(" ", strip=True)
-            else:
-                description = None
-        else:
-            desc_tag = soup.find(config["col_description"])
-            description = desc_tag.get_text(" ", strip=True) if desc_tag else None
+        desc_tag = find(page, config["col_description"])
+        description = (desc_tag["attrs"].get("content") or node_text(desc_tag, " ")) if desc_tag else None
+
+        # Fields found in the embedded JSON win over the HTML ones
+        title = embedded.get("title") or title
+        price = embedded.get("price") or price
+        description = embedded.get("description") or description
 
         print(f'\n---\nTitle: {title}\nPrice: {price}\nDescription: {description}\n---')
         return title, price, description
@@ -138,10 +212,11 @@ def collect_listing_details_driver(driver, url: str, marketplace: str, config: d
 
     print(f"🌍 Opening {marketplace.capitalize()} listing...")
     try:
-        driver.get(url)
+        navigate(driver, url, config.get("ready_listing"), marketplace, "listing")
 
-        try_accept_cookies(driver)
+        try_accept_cookies(driver, marketplace=marketplace)
         WebDriverWait(driver, 10).until(lambda d: (el := d.find_element(*config["col_title"])).text.strip() and "¡Ups!" not in el.text)
+        record_page_load(driver, marketplace, "details")
 
         # Title
         title_element = driver.find_element(By.CSS_SELECTOR, config["col_title"]) if isinstance(config["col_title"], str) else driver.find_element(*config["col_title"])
@@ -167,6 +242,7 @@ def collect_listing_details_driver(driver, url: str, marketplace: str, config: d
             desc_el = driver.find_element(*config["col_description"])
             description = desc_el.get_attribute("content") or desc_el.text.strip()
 
+        record_page(url, driver.page_source, "listing", "driver")
         print(f'\n---\nTitle: {title}\nPrice: {price}\nDescription: {description}\n---')
         return title, price, description
 
@@ -185,56 +261,76 @@ def collect_listing_details_driver(driver, url: str, marketplace: str, config: d
         
         return None
 
-def collect_listing_images(url: str, marketplace: str, config: dict, driver=None) -> tuple[list, str, str] | None:
+def collect_listing_images(url: str, marketplace: str, config: dict, driver=None, page: dict = None, embedded: dict = None) -> tuple[list, str, str] | None:
     """
-    Collect listing images (can reuse existing driver session).
+    Collect listing images (can reuse existing driver session or an already fetched page).
+    The image list comes from the page's embedded JSON, then its HTML; the browser is only
+    launched when neither contains the image URLs.
     Returns (images_local, md5, phash) tuple, or None if aborted/failed.
     """
     if check_abort():
         return None
 
-    local_driver = False
-    if driver is None:
-        print(f"🌍 Opening {marketplace.capitalize()} listing to collect images...")
-        local_driver = True
-        driver = undetected_driver() if marketplace == "milanuncios" else headless_driver()
-
-    images = []
+    images, captured = [], {}
+    if embedded and embedded.get("images"):
+        images = embedded["images"]
+        print(f"⚡ Found {len(images)} image URLs in the page's embedded JSON, no browser needed")
+    elif page is not None and config.get("col_image_http"):
+        images = extract_images_from_html(page, config["col_image_http"], config.get("col_image_filter"))
+        if images:
+            print(f"⚡ Found {len(images)} image URLs in the page HTML, no browser needed")
+        else:
+            print("⚠️ No image URLs in the page HTML, falling back to the browser")
+
+    if not images:
+        local_driver = False
+        if driver is None:
+            print(f"🌍 Opening {marketplace.capitalize()} listing to collect images...")
+            local_driver = True
+            kind = "undetected" if marketplace == "milanuncios" else "headless"
+            driver = _checkout_collect_driver(kind, marketplace, config)
+
+        try:
+            if check_abort():
+                return None
+            print("⏳ Retrieving images...")
+            if local_driver:
+                navigate(driver, url, config.get("ready_listing") or config["col_image_css"], marketplace, "listing")
+                record_page_load(driver, marketplace, "images")
 
-    try:
-        if check_abort():
-            return None
-        print("⏳ Retrieving images...")
-        if local_driver:
-            driver.get(url)
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located(config["col_image_css"]))
+            if check_abort():
+                return None
 
-        if check_abort():
-            return None
+            images = config["col_image_extractor"](driver)
 
-        images = config["col_image_extractor"](driver)
+            # Take the image bytes the browser already received instead of downloading them again
+            if config.get("col_capture_images"):
+                captured = capture_image_bodies(driver, images)
+                if captured:
+                    print(f"⚡ Captured {len(captured)}/{len(images)} images from the browser")
 
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
+        finally:
+            if local_driver:
+                checkin_driver(driver)
 
     if check_abort():
         return None
 
-    # Download images locally
-    images_local = [p for u in images if (p := safe_download_image(u)) is not None]
-    if images_local:
-        print(f"✅ Downloaded {len(images_local)} images")
+    # Download and hash every image in one pass, in parallel (captured ones come straight from memory)
+    records = ingest_images(images, captured, config.get("download_per_host"))
+    records = [r for r in records if r is not None]
+    failed = len(images) - len(records)
+    if records:
+        print(f"✅ Downloaded {len(records)} images" + (f" ({failed} failed)" if failed else ""))
     else:
         print("❌ No images downloaded")
         return ([], None, None)  # failed but not aborted
 
-    # Compute hashes for first image
-    md5, phash = compute_image_hashes(images[0]) if images else (None, None)
-        
+    # Hashes of the first image, from its query-stripped URL like the profile thumbnails they
+    # are compared with (free when that is the URL just downloaded, see ingest_image)
+    images_local = [r["path"] for r in records]
+    md5, phash = compute_image_hashes(images[0])
+
     if check_abort():
         return None
 
@@ -247,18 +343,27 @@ def collect_listing_images(url: str, marketplace: str, config: dict, driver=None
 def check_listing_existence(listing, marketplace: str, config: dict) -> str | None:
     """
     Generic skeleton for marketplace 'check' functions.
-    Returns URL if found, None if not found or aborted.
+    Returns URL if found, None if not found or aborted. In a worker thread a missing session
+    raises LoginRequired instead of prompting for a manual login.
     """
-    driver = None
+    driver = borrowed = None
     try:
         print(f"🔍 Checking if listing exists on {marketplace.capitalize()}...")
-        driver = headless_driver()
+        found = indexed_match(listing, marketplace)
+        if found:
+            return found
+        driver = borrowed = checkout_driver("headless", marketplace, blocked_urls=scraping_block_list(config))
         if check_abort():
             return None
-        driver = ensure_logged_in(driver, config["login_selector"], config["home_url"], marketplace)
+        interactive = not in_worker()
+        driver = ensure_logged_in(driver, config["login_selector"], config["home_url"], marketplace, force_visible_if_needed=interactive)
         if not driver:
+            if not interactive and not check_abort():
+                raise LoginRequired(marketplace)
             print(f"❌ Could not log in to {marketplace.capitalize()}")
             return None
+        if driver is not borrowed:
+            set_resource_blocking(driver, scraping_block_list(config))
 
         if check_abort(driver):
             return None
@@ -268,119 +373,355 @@ def check_listing_existence(listing, marketplace: str, config: dict) -> str | No
             print(f"❌ Could not determine profile URL for {marketplace.capitalize()}")
             return None
 
-        driver.get(profile_url)
+        navigate(driver, profile_url, config.get("ready_profile"), marketplace, "profile")
 
         if check_abort(driver):
             return None
 
         return find_listing_in_profile(driver, listing, marketplace, config)
 
+    except LoginRequired:
+        raise
     except Exception as e:
         print(f"⚠️ {marketplace.capitalize()} check error: {e}")
         return None
 
     finally:
-        if driver:
+        # ensure_logged_in may have replaced the borrowed driver with a fresh one
+        checkin_driver(borrowed)
+        if driver and driver is not borrowed:
+            checkin_driver(driver)
+
+def indexed_match(listing, marketplace: str) -> str | None:
+    """
+    Match against the local index before opening the profile at all. Skipped when a full sync
+    is due, so listings that are gone from the profile cannot keep matching.
+    """
+    if index.needs_full_sync(marketplace):
+        return None
+    return index.find_listing(marketplace, listing)
+
+def check_listing_existence_multi(listing, configs: dict[str, dict], wait: float | None = None) -> dict[str, str | None] | None:
+    """
+    Check several marketplaces with one headless browser: one window per marketplace, each
+    with that marketplace's cookies applied, and the profile scrolls interleaved round-robin,
+    so total time is close to that of the slowest profile. After each round every window is
+    given up to wait seconds (default PROFILE_SCROLL_WAIT) to load more items; the others keep
+    loading meanwhile, so usually only the first one actually waits.
+    Returns {marketplace: url or None} for the marketplaces it could check (login failures are
+    left out so the caller can fall back to the single-marketplace checker), or None if aborted.
+    """
+    if not configs:
+        return {}
+
+    blocked = sorted({p for config in configs.values() for p in scraping_block_list(config)})
+    driver = checkout_driver("headless", "multi", blocked_urls=blocked)
+    windows = {}  # marketplace -> window handle
+    results = {}
+
+    try:
+        # ---------- OPEN ONE WINDOW PER MARKETPLACE ----------
+        for marketplace, config in configs.items():
+            if check_abort(driver):
+                return None
+            print(f"🔍 Checking if listing exists on {marketplace.capitalize()}...")
+            found = indexed_match(listing, marketplace)
+            if found:
+                results[marketplace] = found
+                continue
+            if windows:
+                driver.switch_to.new_window("window")  # separate windows are not throttled like background tabs
+
+            if not ensure_logged_in(driver, config["login_selector"], config["home_url"], marketplace, force_visible_if_needed=False):
+                print(f"❌ Could not log in to {marketplace.capitalize()} in multi-window mode")
+                continue
+            profile_url = config["profile_url_resolver"](driver)
+            if not profile_url:
+                print(f"❌ Could not determine profile URL for {marketplace.capitalize()}")
+                results[marketplace] = None
+                continue
+
+            navigate(driver, profile_url, marketplace=marketplace, stage="profile")  # readiness is awaited below, per window
+            windows[marketplace] = driver.current_window_handle
+
+        # ---------- INTERLEAVED SCROLLING ----------
+        scrolling = {}
+        for marketplace, handle in windows.items():
+            driver.switch_to.window(handle)
+            ready = configs[marketplace].get("ready_profile") or configs[marketplace]["col_image_css"]
             try:
-                driver.quit()
+                WebDriverWait(driver, 10).until(EC.presence_of_element_located(ready))
             except Exception:
                 pass
+            scrolling[marketplace] = profile_sync_rounds(driver, marketplace, configs[marketplace], listing)
+
+        print(f"⏳ Syncing {len(scrolling)} profile pages in parallel...")
+        wait = wait or PROFILE_SCROLL_WAIT
+        heights = {}  # marketplace -> page height before its last scroll
+        while scrolling:
+            for marketplace in list(scrolling):
+                driver.switch_to.window(windows[marketplace])
+                found = None
+                try:
+                    heights[marketplace] = next(scrolling[marketplace])
+                    continue
+                except StopIteration as done:
+                    found = done.value  # matched while scrolling, or None once the sync is over
+                    del scrolling[marketplace]
+                except Exception as e:
+                    print(f"⚠️ {marketplace.capitalize()} scroll error: {e}")
+                    del scrolling[marketplace]
+
+                # this profile is done: close it out while the others keep scrolling
+                record_page_load(driver, marketplace, "profile")
+                record_page(driver.current_url, driver.page_source, "profile", "driver")
+                results[marketplace] = found or index.find_listing(marketplace, listing)
+
+            if check_abort(driver):
+                return None
+            for marketplace in scrolling:
+                driver.switch_to.window(windows[marketplace])
+                wait_until(driver, page_grew(heights[marketplace]), marketplace, "scroll_load", default=wait, expect_timeout=True, min_timeout=wait)
+
+        return results
+
+    except Exception as e:
+        print(f"⚠️ Multi-window check error: {e}")
+        return results
+
+    finally:
+        # close the extra windows so the pooled browser goes back with a single one
+        try:
+            for handle in driver.window_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+        except Exception:
+            pass
+        checkin_driver(driver)
 
 def find_listing_in_profile(driver, listing, marketplace: str, config: dict, hamming_thresh=6) -> str | None:
     """
-    Scroll through profile items and match by title first, then images.
+    Sync the open profile page into the local index, matching each batch of newly loaded
+    listings as it comes in (scrolling stops at the first match), then fall back to the
+    listings indexed earlier.
     Returns URL if found, None otherwise.
     """
     if not driver:
         return None
 
     try:
-        driver.get(driver.current_url)  # make sure page loaded
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located(config["col_image_css"]))
+        # the profile was opened with navigate(); just make sure the items are there
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located(config.get("ready_profile") or config["col_image_css"]))
 
         if check_abort(driver): 
             return None
 
-        print("⏳ Scrolling profile page to load all listings...")
-        items = scroll_to_load_all_items(driver, config["chk_items"])
+        print("⏳ Syncing profile listings into the local index, matching them as they load...")
+        found = sync_profile(driver, marketplace, config, listing, hamming_thresh)
         if check_abort(driver): 
             return None
-        if not items:
-            print(f"❌ No listings found on {marketplace.capitalize()}")
-            return None
-        print(f"🟢 Found {len(items)} listings on {marketplace.capitalize()} profile")
+        record_page_load(driver, marketplace, "profile")
+        record_page(driver.current_url, driver.page_source, "profile", "driver")
 
-        if check_abort(driver): 
-            return None
-
-        # Match by title
-        print("🔍 Checking listings by title to find a match...")
-        for item in items:
-            if check_abort(driver):
-                return None
+        return found or index.find_listing(marketplace, listing, hamming_thresh)
 
-            try:
-                title_text = config["chk_title_extractor"](item)
-                try:
-                    href = config["chk_href_extractor"](item)
-                except Exception as e:
-                    print(f"⚠️ Href parse error: {e}")
-                    continue
+    except Exception as e:
+        print(f"⚠️ Error in find_listing_in_profile: {e}")
 
-                if not href:
-                    print(f"⚠️ Found title '{title_text}' but href is None, skipping...")
-                    continue
+    return None
 
-                if title_text and is_match(listing["title"], title_text):
-                    print(f"✅ Match found by title: {title_text} -> {href}")
-                    return href
 
-            except Exception as e:
-                print(f"⚠️ Title parse error: {e}")
-                continue
+# ---------------------------
+# Profile sync
+# ---------------------------
+PROFILE_NO_CHANGE_ROUNDS = 3   # scroll steps without growth before the profile counts as fully loaded
+PROFILE_SCROLL_WAIT = 1.5      # wait per step (fixed floor); returns as soon as items load
+PROFILE_END_CONFIRM = 5        # a full sync waits this long for more items before pruning what it did not see
 
 
-        # Match by image
-        print("❌ No title match found")
-        print("🔍 Checking listings by image hashes to find a match...")
+def profile_sync_rounds(driver, marketplace: str, config: dict, listing: dict | None = None, hamming_thresh=6):
+    """
+    Read the open profile page into the local index (helpers/index.py), one scroll step per
+    next() like scroll_rounds, so it can be interleaved with other windows. Newest listings
+    come first: an incremental sync stops scrolling at the first listing already indexed,
+    a full sync (first run, then every index.FULL_SYNC_DAYS) reads the whole profile and
+    drops listings that are gone. Only new listings get their thumbnail hashed.
+    With a listing, every batch is matched as soon as it is read and scrolling stops at the
+    first match; the matching URL is the generator's return value (StopIteration.value).
+    Titles are matched before any thumbnail is downloaded: on a title hit only the listings
+    down to the match are hashed and indexed, older ones are left to the next full sync.
+    """
+    started = time.time()
+    known = index.known_urls(marketplace)
+    full = not known or index.needs_full_sync(marketplace)
+    seen, added = set(), 0
+    read = 0  # items already read, in page order
+
+    def _read_new_items() -> tuple[list, bool]:
+        """The items loaded since the last call, and whether an indexed listing showed up."""
+        nonlocal read
+        total, items = read_profile_items(driver, config, read)
+        if total < read:  # the grid was re-rendered: read it again (seen skips duplicates)
+            total, items = read_profile_items(driver, config, 0)
+        batch, reached = [], False
         for item in items:
-            if check_abort(driver):
-                return None
+            href = item["href"]
+            if not href or href in seen:
+                continue
+            seen.add(href)
+            if href in known:
+                reached = True
+                continue
+            batch.append({"url": href, "title": item["title"], "img_url": item["img"], "md5": None, "phash": None})
+        read = total
+        return batch, reached
+
+    def _index_batch(batch: list):
+        # hash the thumbnails of the batch in one concurrent request batch (async backend only)
+        prefetch_image_hashes([item["img_url"] for item in batch if item["img_url"]])
+        for item in batch:
             try:
-                try:
-                    href = config["chk_href_extractor"](item)
-                except Exception as e:
-                    print(f"⚠️ Href parse error: {e}")
-                    continue
-
-                img_url = config["chk_image_extractor"](item)
-                
-                if img_url:
-                    cand_md5, cand_phash = compute_image_hashes(img_url)
-
-                    # DEBUG PRINTS
-                    # print(f"🖼️ Found item image: {img_url}")
-                    # print(f"Listing md5: {listing.get('md5')}, candidate md5: {cand_md5}")
-                    # print(f"Listing phash: {listing.get('phash')}, candidate phash: {cand_phash}")
-
-                    if listing.get("md5") and cand_md5 and listing["md5"] == cand_md5:
-                        print(f"✅ Exact md5 match: {href}")
-                        return href
-                    if listing.get("phash") and cand_phash:
-                        ham = hamming_distance_hex(listing["phash"], cand_phash) 
-                        if ham <= hamming_thresh:
-                            print(f"✅ Perceptual match (hamming={ham}): {href}")
-                            return href
-
+                if item["img_url"]:
+                    item["md5"], item["phash"] = compute_image_hashes(item["img_url"])
             except Exception as e:
-                print(f"⚠️ Item parse error (image check): {e}")
-                continue
-
-        print("❌ No image hash match found")
-
-    except Exception as e:
-        print(f"⚠️ Error in find_listing_in_profile: {e}")
+                print(f"⚠️ Could not hash {item['img_url']}: {e}")
+        index.add_listings(marketplace, batch)
+
+    def _more_items_loaded() -> bool:
+        height = driver.execute_script("return document.body.scrollHeight")
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        return bool(wait_until(driver, page_grew(height), default=PROFILE_END_CONFIRM))
+
+    match = None
+    rounds = scroll_rounds(driver, PROFILE_NO_CHANGE_ROUNDS)
+    batch, reached = _read_new_items()
+    while True:
+        if batch:
+            # nothing is hashed yet, so this can only match by title
+            if listing and (match := index.match_listing(batch, listing, hamming_thresh)):
+                batch = batch[:[item["url"] for item in batch].index(match) + 1]
+            _index_batch(batch)
+            added += len(batch)
+            if match or listing and (match := index.match_listing(batch, listing, hamming_thresh)):
+                break
+        if reached and not full:
+            break
+        try:
+            height = next(rounds)
+        except StopIteration:
+            # a full sync drops every listing it did not see: make sure this really is the end
+            if not full or not _more_items_loaded():
+                break
+            rounds = scroll_rounds(driver, PROFILE_NO_CHANGE_ROUNDS)
+            batch, reached = _read_new_items()
+            continue
+        yield height
+        batch, reached = _read_new_items()
+
+    complete = not match  # stopping at the match may leave newer listings unread
+    index.finish_sync(marketplace, seen, full=full and bool(seen) and complete, started=started if complete else None)
+    how = "stopped at the match" if match else "full sync" if full else "stopped at the first indexed listing"
+    print(f"🗂️ {marketplace.capitalize()} index: {added} new of {len(seen)} listings read ({how})")
+    return match
+
+# Every profile item from index arguments[1] on, read in one script call from the CONFIG
+# locators the chk_*_extractor functions use: {"total": items on the page, "items": [{"href",
+# "title", "img"}]}. XPath steps go through document.evaluate and the first match in document
+# order is taken, like Selenium's find_element, so both paths pick the same elements
+# (Element.closest() would pick the nearest ancestor instead of the outermost one).
+# chk_image is either an <img> locator (its src) or [container, avatar] locators (the first
+# avatar with a background-image URL).
+PROFILE_ITEMS_SCRIPT = """
+    const [itemsLocator, start, fields] = arguments;
+    const findAll = (root, [by, value]) => {
+        if (by === "xpath") {
+            const found = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            return Array.from({length: found.snapshotLength}, (_, i) => found.snapshotItem(i));
+        }
+        return Array.from(root.querySelectorAll(value));
+    };
+    const find = (root, locator) => (root && findAll(root, locator)[0]) || null;
+    const all = findAll(document, itemsLocator);
+    return {
+        total: all.length,
+        items: all.slice(start).map(item => {
+            const titleEl = find(item, fields.title);
+            const link = fields.hrefInTitle ? titleEl : item;
+            const text = !titleEl ? null : fields.titleAttr ? titleEl.getAttribute(fields.titleAttr) : titleEl.innerText;
+            const imageEl = find(item, fields.image);
+            let img = null;
+            if (fields.avatar) {
+                for (const avatar of imageEl ? findAll(imageEl, fields.avatar) : []) {
+                    const match = /url\\(["']?([^"')]+)/.exec(avatar.getAttribute("style") || "");
+                    if (match) { img = match[1].split("?")[0]; break; }
+                }
+            } else if (imageEl && imageEl.getAttribute("src")) {
+                img = imageEl.src.split("?")[0];
+            }
+            return {href: (link && link.href) || null, title: text === null ? null : text.trim(), img: img};
+        }),
+    };
+"""
+
+def _profile_script_fields(config: dict) -> dict:
+    """The chk_* CONFIG locators in the form PROFILE_ITEMS_SCRIPT takes."""
+    image = config["chk_image"]
+    container, avatar = image if isinstance(image, list) else (image, None)
+    return {
+        "title": list(config["chk_title"]),
+        "titleAttr": config.get("chk_title_attr"),
+        "hrefInTitle": bool(config.get("chk_href_in_title")),
+        "image": list(container),
+        "avatar": list(avatar) if avatar else None,
+    }
 
-    return None
+def read_profile_items(driver, config: dict, start: int = 0) -> tuple[int, list[dict]]:
+    """
+    Read the profile items from index start on as [{"href", "title", "img"}], plus how many
+    items the page holds. With CONFIG "chk_items_script" this is one PROFILE_ITEMS_SCRIPT call for
+    the whole batch; otherwise the chk_*_extractor functions run per WebElement (several round trips each).
+    """
+    clean = config.get("chk_title_cleaner")
+    if config.get("chk_items_script"):
+        result = driver.execute_script(PROFILE_ITEMS_SCRIPT, list(config["chk_items"]), start, _profile_script_fields(config))
+        items = result["items"]
+        if clean:
+            for item in items:
+                item["title"] = clean(item["title"]) if item["title"] else None
+        return result["total"], items
+
+    elements = driver.find_elements(*config["chk_items"])
+    items = []
+    for element in elements[start:]:
+        try:
+            href = config["chk_href_extractor"](element)
+        except Exception as e:
+            print(f"⚠️ Href parse error: {e}")
+            continue
+        try:
+            title = config["chk_title_extractor"](element)
+        except Exception as e:
+            print(f"⚠️ Title parse error: {e}")
+            title = None
+        try:
+            img = config["chk_image_extractor"](element)
+        except Exception as e:
+            print(f"⚠️ Item parse error (image): {e}")
+            img = None
+        items.append({"href": href, "title": title, "img": img})
+    return len(elements), items
+
+def sync_profile(driver, marketplace: str, config: dict, listing: dict | None = None, hamming_thresh=6) -> str | None:
+    """Run profile_sync_rounds on the open profile page. Returns the matching URL, or None (also if aborted)."""
+    rounds = profile_sync_rounds(driver, marketplace, config, listing, hamming_thresh)
+    while True:
+        try:
+            height = next(rounds)
+        except StopIteration as done:
+            return done.value
+        wait_until(driver, page_grew(height), marketplace, "scroll_load", default=PROFILE_SCROLL_WAIT, expect_timeout=True, min_timeout=PROFILE_SCROLL_WAIT)
+        if check_abort(driver):
+            return None
 
 
@@ -0,0 +1,87 @@
+import threading
+
+from helpers.drivers import read_network_log
+
+
+
+# ---------------------------
+# Per-run statistics
+# ---------------------------
+# Lightweight counters printed at the end of each main loop run.
+_RUN_STATS: list[dict] = []
+_LOCK = threading.Lock()
+
+PAGE_TIMING_SCRIPT = """
+    const nav = performance.getEntriesByType('navigation')[0];
+    if (!nav) return null;
+    return {dcl: nav.domContentLoadedEventEnd - nav.startTime, load: nav.loadEventEnd - nav.startTime};
+"""
+
+
+def record(kind: str, marketplace: str, **values):
+    """Record one measurement (e.g. a page load) for the current run."""
+    with _LOCK:
+        _RUN_STATS.append({"kind": kind, "marketplace": marketplace, **values})
+
+def run_stats(kind: str) -> list[dict]:
+    """Return the measurements of one kind recorded during this run."""
+    with _LOCK:
+        return [s for s in _RUN_STATS if s["kind"] == kind]
+
+def reset_run_stats():
+    with _LOCK:
+        _RUN_STATS.clear()
+
+def transferred_bytes(driver) -> tuple[int, int] | tuple[None, None]:
+    """
+    Bytes received and number of blocked requests since the previous call, from the driver's
+    performance log. Returns (None, None) if performance logging is off.
+    """
+    net = read_network_log(driver)
+    if not net["enabled"]:
+        return None, None
+    total, blocked = net["bytes"], net["blocked"]
+    net["bytes"] = net["blocked"] = 0
+    return total, blocked
+
+def record_page_load(driver, marketplace: str, stage: str):
+    """Record load time and bytes transferred for the page currently open in the driver."""
+    try:
+        timing = driver.execute_script(PAGE_TIMING_SCRIPT) or {}
+    except Exception:
+        timing = {}
+    total, blocked = transferred_bytes(driver)
+    record("page", marketplace, stage=stage, dcl_ms=timing.get("dcl"), load_ms=timing.get("load"), bytes=total, blocked=blocked)
+
+def print_run_stats():
+    """Print a summary of the collection tiers, navigations and page loads recorded during this run."""
+    navs = run_stats("nav")
+    pages = run_stats("page")
+    tiers = run_stats("tier")
+
+    if tiers:
+        print("\n🪜 Collection tier used this run:")
+        for marketplace in dict.fromkeys(s["marketplace"] for s in tiers):
+            counts = {}
+            for s in tiers:
+                if s["marketplace"] == marketplace:
+                    key = s["tier"] if s["ok"] else f"{s['tier']} (incomplete)"
+                    counts[key] = counts.get(key, 0) + 1
+            print(f"   {marketplace.capitalize():<12} " + ", ".join(f"{tier}: {n}" for tier, n in counts.items()))
+
+    if navs:
+        print("\n⏱️ Navigation latency this run (until ready):")
+        for s in navs:
+            flag = "" if s.get("ready") else "  (ready element not found)"
+            print(f"   {s['marketplace'].capitalize():<12} {s['stage']:<8} {s['seconds']:.2f}s{flag}")
+
+    if not pages:
+        return
+
+    print("\n📊 Page loads this run:")
+    for s in pages:
+        load = f"{s['load_ms'] / 1000:.2f}s" if s.get("load_ms") and s["load_ms"] > 0 else "n/a"
+        dcl = f"{s['dcl_ms'] / 1000:.2f}s" if s.get("dcl_ms") and s["dcl_ms"] > 0 else "n/a"
+        size = f"{s['bytes'] / 1024:.0f} KB" if s.get("bytes") is not None else "n/a"
+        blocked = s.get("blocked") or 0
+        print(f"   {s['marketplace'].capitalize():<12} {s['stage']:<8} DOM ready {dcl:>7} | load {load:>7} | {size:>9} | {blocked} blocked")
@@ -1,9 +1,10 @@
-import re, time
+import re
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
 from helpers.abort import check_abort
+from helpers.waits import wait_until, dom_settled, value_committed, has_focus, in_viewport
 
 
 
@@ -81,11 +82,10 @@ def upload_listing_generic(driver, listing: dict, marketplace: str, config: dict
                 try:
                     title_input = WebDriverWait(driver, 10).until(EC.presence_of_element_located(config["upl_title"]))
                     title_input.click()  # Click to focus naturally first
-                    time.sleep(0.2)
+                    wait_until(driver, has_focus(title_input), marketplace, "focus", default=2)
                     title_input.clear()  # Clear the field
-                    time.sleep(0.1)
                     driver.execute_script(REACT_INPUT_SCRIPT, title_input, listing["title"])  # Use React-compatible setter
-                    time.sleep(0.3)
+                    wait_until(driver, value_committed(title_input, listing["title"]), marketplace, "commit_value", default=3)
                 except Exception as e:
                     print("⚠️ Title not filled automatically:", e)
                 
@@ -109,11 +109,10 @@ def upload_listing_generic(driver, listing: dict, marketplace: str, config: dict
                         keep_ai = config["upl_desc_resolver"](driver=driver, desc_input=desc_input, scraped_desc=listing["description"])
                     else:
                         desc_input.click()  # Click to focus
-                        time.sleep(0.2)
+                        wait_until(driver, has_focus(desc_input), marketplace, "focus", default=2)
                         desc_input.clear()  # Clear the field
-                        time.sleep(0.1)
                         driver.execute_script(REACT_INPUT_SCRIPT, desc_input, listing["description"])  # Use React-compatible setter
-                        time.sleep(0.3)
+                        wait_until(driver, value_committed(desc_input, listing["description"]), marketplace, "commit_value", default=3)
                 except Exception as e:
                     print("⚠️ Description not filled:", e)
                 
@@ -134,13 +133,12 @@ def upload_listing_generic(driver, listing: dict, marketplace: str, config: dict
                     price_cleaned = listing["price"].replace("€", "").replace(",", ".").strip()
                     price_input = WebDriverWait(driver, 10).until(EC.presence_of_element_located(config["upl_price"]))
                     driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", price_input)  # Scroll element into view
-                    time.sleep(0.2)
+                    wait_until(driver, in_viewport(price_input), marketplace, "scroll_into_view", default=2)
                     driver.execute_script("arguments[0].click();", price_input)  # Click using JavaScript to bypass overlapping elements
-                    time.sleep(0.2)
+                    wait_until(driver, has_focus(price_input), marketplace, "focus", default=2)
                     price_input.clear()  # Clear the field
-                    time.sleep(0.1)
                     driver.execute_script(REACT_INPUT_SCRIPT, price_input, price_cleaned)  # Use React-compatible setter
-                    time.sleep(0.3)
+                    wait_until(driver, value_committed(price_input, price_cleaned), marketplace, "commit_value", default=3)
                 except Exception as e:
                     print("⚠️ Price not filled automatically:", e)
                 
@@ -159,7 +157,7 @@ def upload_listing_generic(driver, listing: dict, marketplace: str, config: dict
             try:
                 category_dropdown = WebDriverWait(driver, 10).until(EC.element_to_be_clickable(config["upl_category"]))
                 category_dropdown.click()
-                time.sleep(0.5)
+                wait_until(driver, lambda d: config["upl_category_resolver"](d, category_dropdown), marketplace, "dropdown_open", default=3)
                 print("✅ Category dropdown opened")
             except Exception as e:
                 print("⚠️ Could not click category dropdown:", e)
@@ -177,18 +175,18 @@ def upload_listing_generic(driver, listing: dict, marketplace: str, config: dict
                 try:
                     dropdown_is_open = config["upl_category_resolver"](driver, category_dropdown)
                     if dropdown_is_open:
-                        time.sleep(0.5)
+                        wait_until(driver, dom_settled(), marketplace, "dropdown_render", default=3)
                         first_option = WebDriverWait(driver, 10).until(EC.element_to_be_clickable(config["upl_category_first"]))
 
                         # Scroll the element into view
                         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", first_option)
-                        time.sleep(0.3)
+                        wait_until(driver, in_viewport(first_option), marketplace, "scroll_into_view", default=2)
 
                         first_option = WebDriverWait(driver, 10).until(EC.element_to_be_clickable(config["upl_category_first"]))
                         first_option.click()
                         print("✅ First recommended category selected")
                     else:
-                        time.sleep(1)
+                        wait_until(driver, dom_settled(), marketplace, "dropdown_close", default=3)
                         print("✅ Category dropdown closed")
                         break 
                 except Exception as e:
@@ -212,7 +210,7 @@ def upload_listing_generic(driver, listing: dict, marketplace: str, config: dict
                     try:
                         btn.click()
                         print("✅ Clicked on the 'Continue' button")
-                        time.sleep(0.5)
+                        wait_until(driver, dom_settled(), marketplace, "next_step", default=5)
                         break
                     except Exception as e:
                         print(f"⚠️ Could not click Continue button: {e}")
@@ -2,9 +2,14 @@ import time
 from difflib import SequenceMatcher
 from contextlib import contextmanager
 from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 
 from helpers.drivers import headless_driver, visible_driver
 from helpers.abort import check_abort
+from helpers.stats import record
+from helpers.waits import wait_until, page_grew
+from helpers.replay import driver_url
 
 
 
@@ -31,24 +36,56 @@ def vinted_title_shorten(raw_title: str) -> str:
     return raw_title[:colon_idx].strip()
 
 
-def scroll_to_load_all_items(driver: WebDriver, item_selector: str) -> list:
-    wait = 0.5
-    rounds_no_new = 0
-    max_no_change_rounds = 10
+def navigate(driver: WebDriver, url: str, ready=None, marketplace: str = "", stage: str = "", timeout: float = 10) -> bool:
+    """
+    Open url and return as soon as the page is usable instead of waiting for the full load event.
+    Drivers use the "eager" page-load strategy, so driver.get() returns at DOMContentLoaded;
+    ready is an optional locator (the marketplace's ready_* CONFIG entry) to wait for on top.
+    Records the navigation latency per marketplace. Returns False if ready never appeared.
+    While replaying, the recorded copy of the page is opened instead (helpers/replay.py).
+    """
+    start = time.perf_counter()
+    driver.get(driver_url(url))
+    ok = True
+    if ready:
+        try:
+            WebDriverWait(driver, timeout).until(EC.presence_of_element_located(ready))
+        except Exception:
+            ok = False
+    if marketplace:
+        record("nav", marketplace, stage=stage, seconds=time.perf_counter() - start, ready=ok)
+    return ok
 
+def scroll_rounds(driver: WebDriver, max_no_change_rounds: int = 10):
+    """
+    Step-wise infinite scroll: each next() checks whether the previous scroll grew the page,
+    then scrolls to the bottom again and yields the height before that scroll. The caller
+    waits between steps (e.g. with page_grew(height)), which lets several
+    pages (e.g. one window per marketplace) be scrolled interleaved in the same browser.
+    Stops once the height has not changed for max_no_change_rounds steps.
+    """
     last_height = driver.execute_script("return document.body.scrollHeight")
     rounds_no_change = 0
 
-    while rounds_no_change < max_no_change_rounds:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(wait)
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    yield last_height
+    while True:
         new_height = driver.execute_script("return document.body.scrollHeight")
         if new_height > last_height:
             last_height = new_height
             rounds_no_change = 0
         else:
             rounds_no_change += 1
+        if rounds_no_change >= max_no_change_rounds:
+            return
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        yield last_height
+
+def scroll_to_load_all_items(driver: WebDriver, item_selector: str, marketplace: str = "") -> list:
+    wait = 0.5  # upper bound per round; returns as soon as more items have loaded
 
+    for height in scroll_rounds(driver):
+        wait_until(driver, page_grew(height), marketplace, "scroll_load", default=wait, expect_timeout=True)
         if check_abort(driver): 
             return None
 
@@ -0,0 +1,155 @@
+import os, json, time, atexit, threading
+from collections import deque
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+from constants import SCRIPT_DIR
+
+
+
+# ---------------------------
+# Wait engine
+# ---------------------------
+# Condition-based waits instead of fixed time.sleep() guesses. Every wait is keyed by
+# (marketplace, key) and its observed latency is remembered, so the timeout adapts to what
+# each site actually needs; the history is kept in SCRIPT_DIR between runs.
+LATENCY_FILE = os.path.join(SCRIPT_DIR, "wait_latencies.json")
+MAX_SAMPLES = 50       # latencies remembered per (marketplace, key)
+MIN_SAMPLES = 5        # below this the caller's default timeout is used as is
+SAFETY_FACTOR = 3.0    # timeout = p95 of observed latencies x this
+MIN_TIMEOUT = 0.5
+POLL = 0.05
+
+_LATENCIES: dict[str, deque] = {}
+_LOCK = threading.Lock()
+
+
+def _load_latencies():
+    try:
+        with open(LATENCY_FILE, "r", encoding="utf-8") as f:
+            for k, samples in json.load(f).items():
+                _LATENCIES[k] = deque(samples, maxlen=MAX_SAMPLES)
+    except (OSError, ValueError):
+        pass
+
+@atexit.register
+def _save_latencies():
+    if not _LATENCIES:
+        return
+    try:
+        with _LOCK:
+            data = {k: list(v) for k, v in _LATENCIES.items()}
+        with open(LATENCY_FILE, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    except OSError:
+        pass
+
+_load_latencies()
+
+def observe(marketplace: str, key: str, seconds: float):
+    """Remember how long a condition took to become true."""
+    with _LOCK:
+        _LATENCIES.setdefault(f"{marketplace}:{key}", deque(maxlen=MAX_SAMPLES)).append(round(seconds, 3))
+
+def adaptive_timeout(marketplace: str, key: str, default: float) -> float:
+    """Timeout for a wait: a multiple of its observed p95 latency, capped at default."""
+    with _LOCK:
+        samples = sorted(_LATENCIES.get(f"{marketplace}:{key}") or [])
+    if len(samples) < MIN_SAMPLES:
+        return default
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    return min(max(p95 * SAFETY_FACTOR, MIN_TIMEOUT), default)
+
+def wait_until(driver, condition, marketplace: str = "", key: str = "", default: float = 10, expect_timeout: bool = False, min_timeout: float = 0):
+    """
+    Poll condition(driver) until it returns something truthy, then return it.
+    Returns None on timeout (callers decide whether that is an error). A timeout is recorded
+    as a slow sample so the next wait for the same step gets more room, unless expect_timeout
+    says timing out is a normal outcome (e.g. no more items to load). min_timeout keeps a floor
+    under the adaptive timeout where a timeout decides something (e.g. the end of a profile).
+    """
+    timeout = max(adaptive_timeout(marketplace, key, default) if key else default, min_timeout)
+    start = time.perf_counter()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL, ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+    except TimeoutException:
+        if key and not expect_timeout:
+            observe(marketplace, key, timeout * 2)
+        return None
+    if key:
+        observe(marketplace, key, time.perf_counter() - start)
+    return result
+
+
+# ---------------------------
+# Conditions
+# ---------------------------
+DOM_SETTLED_SCRIPT = """
+    if (!window.__lastMutation) {
+        window.__lastMutation = performance.now();
+        new MutationObserver(() => { window.__lastMutation = performance.now(); })
+            .observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    }
+    return performance.now() - window.__lastMutation >= arguments[0];
+"""
+
+NETWORK_IDLE_SCRIPT = """
+    const entries = performance.getEntriesByType('resource');
+    const last = entries.reduce((m, e) => Math.max(m, e.responseEnd || e.startTime), 0);
+    return document.readyState !== 'loading' && performance.now() - last >= arguments[0];
+"""
+
+def dom_settled(quiet_ms: int = 300):
+    """True once the DOM has not mutated for quiet_ms (animations, re-renders, popups done)."""
+    return lambda d: d.execute_script(DOM_SETTLED_SCRIPT, quiet_ms)
+
+def network_idle(quiet_ms: int = 500):
+    """True once no resource has finished loading for quiet_ms."""
+    return lambda d: d.execute_script(NETWORK_IDLE_SCRIPT, quiet_ms)
+
+def value_committed(element, expected: str):
+    """True once the input shows the expected value (React has accepted it)."""
+    def _check(_):
+        val = element.get_attribute("value") or element.get_attribute("textContent") or element.text or ""
+        return expected in val
+    return _check
+
+def has_focus(element):
+    """True once the element is the active element."""
+    return lambda d: d.execute_script("return document.activeElement === arguments[0];", element)
+
+def in_viewport(element):
+    """True once the element is scrolled into the visible part of the page."""
+    return lambda d: d.execute_script(
+        "const r = arguments[0].getBoundingClientRect();"
+        "return r.top >= 0 && r.bottom <= (window.innerHeight || document.documentElement.clientHeight);",
+        element,
+    )
+
+def element_gone(element):
+    """True once the element is hidden or detached (e.g. a closed cookie banner)."""
+    def _check(_):
+        try:
+            return not element.is_displayed()
+        except StaleElementReferenceException:
+            return True
+    return _check
+
+def any_present(locators: list):
+    """Return the first element found for any of the locators."""
+    def _check(d):
+        for locator in locators:
+            elems = d.find_elements(*locator)
+            if elems:
+                return elems[0]
+        return False
+    return _check
+
+def text_changed(element, old_text: str):
+    """True once the element's text differs from old_text."""
+    return lambda _: element.text.strip() != old_text
+
+def page_grew(old_height: int):
+    """True once document height exceeds old_height (infinite scroll loaded more items)."""
+    return lambda d: d.execute_script("return document.body.scrollHeight") > old_height
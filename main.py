@@ -1,9 +1,15 @@
-import time, threading, traceback
+import time, threading, traceback, argparse
 
 from marketplaces import wallapop, vinted, milanuncios
 
 from helpers.images import remove_temp_folder
+from helpers.pool import checkin_driver, close_pool
+from helpers.profiles import gc_profiles
+from helpers.stats import print_run_stats, reset_run_stats
+from helpers.http_session import print_http_stats, reset_http_stats, close_session
+from helpers.http_async import close_async
 from helpers.abort import listen_for_abort, reset_abort, check_abort
+from helpers.batch import read_urls, run_batch
 from helpers.parsing import detect_marketplace, check_required, choose_destination, collect_listing, check_existing_in_other_marketplaces, upload_listing
 
 
@@ -14,6 +20,7 @@ from helpers.parsing import detect_marketplace, check_required, choose_destinati
 
 def main():
     print("=== Cross-Marketplace Tool ===")
+    gc_profiles()  # worker profiles left behind by crashed runs
     threading.Thread(target=listen_for_abort, daemon=True).start()
     
     while True:
@@ -36,9 +43,9 @@ def main():
             if check_abort(): 
                 continue
 
-            # # Step 1.5: Check if it already exists in other marketplaces
-            # listing["exists_in"] = {}
-            # check_existing_in_other_marketplaces(listing)
+            # Step 1.5: Check if it already exists in other marketplaces (all checkers at once)
+            listing["exists_in"] = {}
+            check_existing_in_other_marketplaces(listing)
 
             if check_abort(): 
                 continue
@@ -60,19 +67,15 @@ def main():
         
         finally:
             reset_abort()
+            print_run_stats()
+            print_http_stats()
+            reset_run_stats()
+            reset_http_stats()
 
             again = input("\nDo you want to submit another listing? (y/n): ").strip().lower()
                 
-            # Close driver
-            try:
-                if driver:
-                    driver.quit()
-            except NameError:
-                print("Driver was never created")
-                pass
-            except Exception:
-                print("Driver exists but is already closed or invalid")
-                pass
+            # Return upload driver to the pool (kept warm for the next listing)
+            checkin_driver(driver)
 
             # Cleanup temp images
             try:
@@ -83,6 +86,35 @@ def main():
             if again != "y":
                 break       
 
+    close_pool()
+    close_async()
+    close_session()
+
+
+# ---------------------------
+# Batch mode
+# ---------------------------
+def batch(source: str, out_path: str):
+    """Collect every listing URL from a file (or "-" for stdin) into a JSONL file, no prompts."""
+    print("=== Cross-Marketplace Tool (batch) ===")
+    gc_profiles()
+    try:
+        run_batch(read_urls(source), out_path)
+    finally:
+        print_run_stats()
+        print_http_stats()
+        close_pool()
+        close_async()
+        close_session()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Cross-Marketplace Tool")
+    parser.add_argument("--batch", metavar="FILE", help='collect the listing URLs in FILE ("-" for stdin) without prompts')
+    parser.add_argument("--out", default="listings.jsonl", help="JSONL file batch results are appended to (default: listings.jsonl)")
+    args = parser.parse_args()
+
+    if args.batch:
+        batch(args.batch, args.out)
+    else:
+        main()
\ No newline at end of file
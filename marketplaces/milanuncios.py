@@ -1,17 +1,19 @@
-import time, re
+import re
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import StaleElementReferenceException
 
-from constants import register_marketplace
+from constants import register_marketplace, COMMON_BLOCK_URLS
 from helpers.scraping import collect_listing_generic, check_listing_existence
 from helpers.images import extract_images_generic
 from helpers.uploader import upload_listing_generic
-from helpers.drivers import headless_driver, visible_driver
+from helpers.pool import checkout_driver
 from helpers.cookies import ensure_logged_in
+from helpers.utils import navigate
 from helpers.abort import check_abort
+from helpers.waits import wait_until, dom_settled, text_changed
 
 
 MARKETPLACE = "milanuncios"
@@ -27,8 +29,14 @@ CONFIG = {
     
     "login_selector": (By.CSS_SELECTOR, "span.ma-UserAvatar"),
     
+    # Readiness: element each step waits for after navigating (pages load with the "eager" strategy)
+    "ready_listing": (By.CSS_SELECTOR, "h1"),
+    "ready_profile": (By.CSS_SELECTOR, "tsl-catalog-item a.item-details"),
+    "ready_upload": (By.ID, "category-finder"),
+    
     # Collection selectors
     "use_driver_for_details": True,
+    "collect_tiers": ["http", "undetected"],  # plain fetch first (with saved clearance), browser only when challenged
     "col_title": (By.CSS_SELECTOR, "h1"),
     "col_price": (By.CSS_SELECTOR, "span.ma-AdPrice-value"),
     "col_price_filter": None,
@@ -36,13 +44,26 @@ CONFIG = {
     "col_first_img": None,
     "col_carousel_imgs": None,
     "col_image_css": (By.CSS_SELECTOR, "img[data-testid='SHARED_SLIDER_IMAGES']"),
+    "col_json": None,  # listing data embedded in the page (read before the HTML selectors, see helpers/embedded.py)
+    "col_image_http": ["img", "data-testid", "SHARED_SLIDER_IMAGES"],  # image elements in the fetched HTML (no browser needed)
     "col_image_filter": lambda src: src and "images.milanuncios.com" in src and "rule=detail_640x480" in src,
     "col_image_pre_hook": None, 
+    "col_capture_images": True,  # reuse image bytes the browser already loaded (no second download)
+    "download_per_host": {"images.milanuncios.com": 4},  # parallel image downloads allowed per CDN host
+    "cache_ttl": {"page": 300, "image": 7 * 24 * 3600},  # seconds served from the disk HTTP cache without revalidation
+    "batch_concurrency": 1,  # listings collected at the same time in batch mode (may need an undetected browser)
+    "rate_limit": {"rate": 2, "burst": 4},  # HTTP requests per second per host (and burst allowed), pages + CDN
+    "http_retries": 3,  # retries on 429 / 5xx / connection errors (jittered backoff, honours Retry-After)
+    
+    # Resource blocking (collect / check drivers only, never uploads)
+    "block_urls": COMMON_BLOCK_URLS,
+    "block_image_urls": ["*images.milanuncios.com/*"],  # only the src URLs are needed, not the bytes
     
     # Check selectors
     "chk_items": (By.CSS_SELECTOR, "tsl-catalog-item a.item-details"),
     "chk_title": (By.CSS_SELECTOR, ".info-title"),
     "chk_image": [(By.XPATH, "./ancestor::div[contains(@class, 'row')]"), (By.CSS_SELECTOR, "div.ItemAvatar")],
+    "chk_items_script": True,  # read profile items with one script call from the chk_* locators (helpers/scraping.py)
     
     # Upload selectors
     "upl_title": (By.ID, "category-finder"),
@@ -69,7 +90,7 @@ def col_image_pre_hook(driver):
     """Click through Milanuncios carousel to load all images."""    
     try:
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "img[data-testid='SHARED_SLIDER_IMAGES']")))
-        time.sleep(1)
+        wait_until(driver, dom_settled(), MARKETPLACE, "slider_ready", default=2)
         
         # Try to get total images
         try:
@@ -77,14 +98,16 @@ def col_image_pre_hook(driver):
             counter_text = counter_el.text.strip()
             total_images = int(counter_text.split("/")[-1].strip()) if "/" in counter_text else 1
         except Exception:
+            counter_el = None
             total_images = 1  # fallback if no counter visible
         
         next_button = driver.find_element(By.CSS_SELECTOR, "button[data-testid='SHARED-SLIDER-ARROW-RIGHT']")
         
         for i in range(total_images - 1):  # -1 because first image is already loaded
             try:
+                old_text = counter_el.text.strip()
                 next_button.click()
-                time.sleep(0.5)  # Wait for image to load
+                wait_until(driver, text_changed(counter_el, old_text), MARKETPLACE, "slider_next", default=1)  # next slide shown
             except:
                 break
                 
@@ -132,7 +155,7 @@ def chk_image_extractor(item):
         for avatar in avatar_divs:
             style = avatar.get_attribute("style")
             if "url(" in style:
-                match = re.search(r'url\([\"]?([^\")]+)', style)
+                match = re.search(r'url\(["\']?([^"\')]+)', style)
                 if match:
                     return match.group(1).split("?")[0]
     except:
@@ -146,9 +169,9 @@ def chk_image_extractor(item):
 def upload_to_milanuncios(listing: dict):
     """Upload listing to Milanuncios."""
     print(f"🌍 Opening {MARKETPLACE.capitalize()} upload page...")
-    driver = visible_driver()
+    driver = checkout_driver("visible", MARKETPLACE)
     ensure_logged_in(driver, CONFIG["login_selector"], CONFIG["home_url"], MARKETPLACE)
-    driver.get(CONFIG["upload_url"])
+    navigate(driver, CONFIG["upload_url"], CONFIG["ready_upload"], MARKETPLACE, "upload")
     
     return upload_listing_generic(driver, listing, MARKETPLACE, CONFIG)
 
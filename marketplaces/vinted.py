@@ -1,16 +1,17 @@
-import time, re
+import re
 
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import StaleElementReferenceException
 
-from constants import register_marketplace
+from constants import register_marketplace, COMMON_BLOCK_URLS
 from helpers.scraping import collect_listing_generic, check_listing_existence
 from helpers.images import extract_images_generic
 from helpers.uploader import upload_listing_generic
-from helpers.drivers import headless_driver, visible_driver
+from helpers.pool import checkout_driver
 from helpers.cookies import ensure_logged_in
-from helpers.utils import vinted_title_shorten
+from helpers.utils import navigate, vinted_title_shorten
 from helpers.abort import check_abort
+from helpers.waits import wait_until
 
 
 
@@ -27,6 +28,11 @@ CONFIG = {
     
     "login_selector": (By.CSS_SELECTOR,"button#user-menu-button"),
     
+    # Readiness: element each step waits for after navigating (pages load with the "eager" strategy)
+    "ready_listing": (By.CSS_SELECTOR, "img[data-testid^='item-photo']"),
+    "ready_profile": (By.CSS_SELECTOR, "div[data-testid='grid-item']"),
+    "ready_upload": (By.CSS_SELECTOR, 'input[type="file"]'),
+    
     # Collection selectors
     "use_driver_for_details": False,
     "col_title": ["h1", "class", "web_ui__Text__title"],
@@ -36,13 +42,31 @@ CONFIG = {
     "col_first_img": (By.CSS_SELECTOR, "img[data-testid^='item-photo']"),
     "col_carousel_imgs": (By.CSS_SELECTOR, "img[data-testid='image-carousel-image-shown'], img[data-testid='image-carousel-image']"),
     "col_image_css": (By.CSS_SELECTOR, "img"),
+    "col_json": [  # listing data embedded in the page (read before the HTML selectors, see helpers/embedded.py)
+        {"source": "ld+json", "type": "Product", "title": ["name"], "price": ["offers", "price"],
+         "currency": ["offers", "priceCurrency"], "description": ["description"], "images": ["image"]},
+    ],
+    "col_image_http": ["img", "data-testid", lambda v: v and v.startswith("item-photo")],  # image elements in the fetched HTML (no browser needed)
     "col_image_filter": None,
     "col_image_pre_hook": None,
+    "col_capture_images": True,  # reuse image bytes the browser already loaded (no second download)
+    "download_per_host": {"images1.vinted.net": 6},  # parallel image downloads allowed per CDN host
+    "cache_ttl": {"page": 300, "image": 30 * 24 * 3600},  # seconds served from the disk HTTP cache (CDN image URLs never change)
+    "batch_concurrency": 4,  # listings collected at the same time in batch mode (main.py --batch)
+    "rate_limit": {"rate": 4, "burst": 8},  # HTTP requests per second per host (and burst allowed), pages + CDN
+    "http_retries": 3,  # retries on 429 / 5xx / connection errors (jittered backoff, honours Retry-After)
+    
+    # Resource blocking (collect / check drivers only, never uploads)
+    "block_urls": COMMON_BLOCK_URLS,
+    "block_image_urls": ["*images1.vinted.net/*"],  # only the src URLs are needed, not the bytes
     
     # Check selectors
     "chk_items": (By.CSS_SELECTOR, "div[data-testid='grid-item']"),
     "chk_title": (By.CSS_SELECTOR, "a.new-item-box__overlay--clickable"),
     "chk_image": (By.CSS_SELECTOR, "img.web_ui__Image__content"),
+    "chk_title_attr": "title",  # title read from this attribute of the chk_title element (default: its text)
+    "chk_href_in_title": True,  # the listing link is the chk_title element (default: the chk_items element)
+    "chk_items_script": True,  # read profile items with one script call from the chk_* locators (helpers/scraping.py)
     
     # Upload selectors
     "upl_title": (By.ID, "title"),
@@ -70,7 +94,7 @@ def col_image_pre_hook(driver):
     try:
         first_img = driver.find_element(*CONFIG["col_first_img"])
         driver.execute_script("arguments[0].click();", first_img)
-        time.sleep(0.5)
+        wait_until(driver, lambda d: d.find_elements(*CONFIG["col_carousel_imgs"]), MARKETPLACE, "carousel_open", default=2)
     except Exception:
         pass
 
@@ -131,9 +155,9 @@ def chk_image_extractor(item):
 def upload_to_vinted(listing: dict):
     """Upload listing to Vinted."""
     print(f"🌍 Opening {MARKETPLACE.capitalize()} upload page...")
-    driver = visible_driver()
+    driver = checkout_driver("visible", MARKETPLACE)
     ensure_logged_in(driver, CONFIG["login_selector"], CONFIG["home_url"], MARKETPLACE)
-    driver.get(CONFIG["upload_url"])
+    navigate(driver, CONFIG["upload_url"], CONFIG["ready_upload"], MARKETPLACE, "upload")
 
     return upload_listing_generic(driver, listing, MARKETPLACE, CONFIG)
 
@@ -153,6 +177,7 @@ CONFIG["profile_url_resolver"] = profile_url_resolver
 CONFIG["chk_title_extractor"] = chk_title_extractor
 CONFIG["chk_href_extractor"] = chk_href_extractor
 CONFIG["chk_image_extractor"] = chk_image_extractor
+CONFIG["chk_title_cleaner"] = vinted_title_shorten
 CONFIG["upl_desc_resolver"] = None
 CONFIG["upl_category_resolver"] = upl_category_resolver
 
@@ -3,12 +3,13 @@ import time, re
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import StaleElementReferenceException
 
-from constants import register_marketplace
+from constants import register_marketplace, COMMON_BLOCK_URLS
 from helpers.scraping import collect_listing_generic, check_listing_existence
 from helpers.images import extract_images_generic
 from helpers.uploader import upload_listing_generic
-from helpers.drivers import headless_driver, visible_driver
+from helpers.pool import checkout_driver
 from helpers.cookies import ensure_logged_in
+from helpers.utils import navigate
 from helpers.abort import check_abort
 
 
@@ -25,6 +26,11 @@ CONFIG = {
     
     "login_selector": (By.CSS_SELECTOR,"img[data-testid='user-avatar']"),
     
+    # Readiness: element each step waits for after navigating (pages load with the "eager" strategy)
+    "ready_listing": (By.CSS_SELECTOR, "img[slot='carousel-content']"),
+    "ready_profile": (By.CSS_SELECTOR, "tsl-catalog-item a.item-details"),
+    "ready_upload": (By.ID, "summary"),
+    
     # Collection selectors
     "use_driver_for_details": False,
     "col_title": ["h1", "class", "item-detail_ItemDetailTwoColumns__title__VtWrR"],
@@ -34,13 +40,31 @@ CONFIG = {
     "col_first_img": None,
     "col_carousel_imgs": None,
     "col_image_css": (By.CSS_SELECTOR, "img[slot='carousel-content']"),
+    "col_json": [  # listing data embedded in the page (read before the HTML selectors, see helpers/embedded.py)
+        {"source": "next_data", "root": ["props", "pageProps", "item"], "title": ["title"], "price": ["price", "cash", "amount"],
+         "currency": ["price", "cash", "currency"], "description": ["description"], "images": ["images", "*", "urls", "big"]},
+        {"source": "ld+json", "type": "Product", "title": ["name"], "price": ["offers", "price"],
+         "currency": ["offers", "priceCurrency"], "description": ["description"], "images": ["image"]},
+    ],
+    "col_image_http": ["img", "slot", "carousel-content"],  # image elements in the fetched HTML (no browser needed)
     "col_image_filter": lambda src: src and "cdn.wallapop.com" in src and "W640" in src,
     "col_image_pre_hook": None, 
+    "col_capture_images": True,  # reuse image bytes the browser already loaded (no second download)
+    "download_per_host": {"cdn.wallapop.com": 6},  # parallel image downloads allowed per CDN host
+    "cache_ttl": {"page": 300, "image": 30 * 24 * 3600},  # seconds served from the disk HTTP cache (CDN image URLs never change)
+    "batch_concurrency": 4,  # listings collected at the same time in batch mode (main.py --batch)
+    "rate_limit": {"rate": 8, "burst": 16},  # HTTP requests per second per host (and burst allowed), pages + CDN
+    "http_retries": 3,  # retries on 429 / 5xx / connection errors (jittered backoff, honours Retry-After)
+    
+    # Resource blocking (collect / check drivers only, never uploads)
+    "block_urls": COMMON_BLOCK_URLS,
+    "block_image_urls": ["*cdn.wallapop.com/images/*"],  # only the src URLs are needed, not the bytes
     
     # Check selectors
     "chk_items": (By.CSS_SELECTOR, "tsl-catalog-item a.item-details"),
     "chk_title": (By.CSS_SELECTOR, ".info-title"),
     "chk_image": [(By.XPATH, "./ancestor::div[contains(@class, 'row')]"), (By.CSS_SELECTOR, "div.ItemAvatar")],
+    "chk_items_script": True,  # read profile items with one script call from the chk_* locators (helpers/scraping.py)
     
     # Upload selectors
     "upl_title": (By.ID, "summary"),
@@ -104,7 +128,7 @@ def chk_image_extractor(item):
         for avatar in avatar_divs:
             style = avatar.get_attribute("style")
             if "url(" in style:
-                match = re.search(r'url\([\"]?([^\")]+)', style)
+                match = re.search(r'url\(["\']?([^"\')]+)', style)
                 if match:
                     return match.group(1).split("?")[0]
     except:
@@ -118,9 +142,9 @@ def chk_image_extractor(item):
 def upload_to_wallapop(listing: dict):
     """Upload listing to Wallapop."""
     print(f"🌍 Opening {MARKETPLACE.capitalize()} upload page...")
-    driver = visible_driver()
+    driver = checkout_driver("visible", MARKETPLACE)
     ensure_logged_in(driver, CONFIG["login_selector"], CONFIG["home_url"], MARKETPLACE)
-    driver.get(CONFIG["upload_url"])
+    navigate(driver, CONFIG["upload_url"], CONFIG["ready_upload"], MARKETPLACE, "upload")
     
     return upload_listing_generic(driver, listing, MARKETPLACE, CONFIG)
 
@@ -0,0 +1,4 @@
+import os, sys
+
+# the scripts import each other from the repo root (constants, helpers, marketplaces)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
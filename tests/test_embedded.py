@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+
+from helpers.embedded import extract_embedded_listing
+from helpers.images import extract_images_from_html
+from helpers.parsers import available_parsers, parse_page
+from helpers.scraping import collect_listing_details_http
+from marketplaces import wallapop, vinted
+
+
+
+# ---------------------------
+# Embedded listing JSON on every parser backend
+# ---------------------------
+# Saved listing pages (trimmed to what the specs read) are parsed by each installed backend
+# and read with the marketplace's own CONFIG["col_json"] and "col_image_filter": every backend
+# must give the same listing, down to the raw script text (no entity decoding, no stripped emoji).
+FIXTURES = Path(__file__).parent / "fixtures"
+
+EXPECTED = {
+    "wallapop": {
+        "title": "Chaqueta vaquera Levi's talla M",
+        "price": "25,50 €",
+        "description": "Chaqueta vaquera en muy buen estado.\nTalla M & L, apenas usada <b>original</b>. Envío incluido 📦",
+        "images": [
+            "https://cdn.wallapop.com/images/10420/a1/__/c10420p1/i1.jpg?pictureSize=W640",
+            "https://cdn.wallapop.com/images/10420/a2/__/c10420p1/i2.jpg?pictureSize=W640",
+        ],
+    },
+    "vinted": {
+        "title": "Zapatillas Nike Air Max 90",
+        "price": "40,00 €",
+        "description": "Talla 42. Usadas pero limpias & sin roturas.\nSe envían en su caja.",
+        "images": [
+            "https://images1.vinted.net/t/01_00f3a_abc/f800/1712345678.jpeg?s=1",
+            "https://images1.vinted.net/t/01_00f3a_def/f800/1712345679.jpeg?s=2",
+        ],
+    },
+}
+CONFIGS = {"wallapop": wallapop.CONFIG, "vinted": vinted.CONFIG}
+SPECS = {name: config["col_json"] for name, config in CONFIGS.items()}
+
+
+def _page(name: str, parser: str) -> dict:
+    return parse_page((FIXTURES / f"{name}.html").read_text(encoding="utf-8"), parser)
+
+
+@pytest.mark.parametrize("parser", available_parsers())
+@pytest.mark.parametrize("marketplace", sorted(EXPECTED))
+def test_extract_embedded_listing(marketplace, parser):
+    page = _page(f"{marketplace}_listing", parser)
+    found = extract_embedded_listing(page, SPECS[marketplace], CONFIGS[marketplace]["col_image_filter"])
+    assert found == EXPECTED[marketplace]  # the seller avatar in the Wallapop JSON is filtered out
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_specs_are_tried_in_order(parser):
+    """A field found by the first spec is kept; later specs only fill in what is missing."""
+    page = _page("wallapop_listing", parser)
+    ld_first = [SPECS["wallapop"][1], SPECS["wallapop"][0]]
+    found = extract_embedded_listing(page, ld_first, wallapop.CONFIG["col_image_filter"])
+    assert found["title"] == "Chaqueta vaquera (ld+json)"
+    assert found["price"] == "99,00 €"
+    assert found["images"] == EXPECTED["wallapop"]["images"]
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_missing_fields_are_absent(parser):
+    page = parse_page("<html><body><p>No embedded data</p></body></html>", parser)
+    assert extract_embedded_listing(page, SPECS["wallapop"]) == {}
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_price_without_currency_path(parser):
+    spec = {**SPECS["wallapop"][0]}
+    del spec["currency"]
+    assert extract_embedded_listing(_page("wallapop_listing", parser), [spec])["price"] == "25,50 €"
+
+
+# ---------------------------
+# HTML fallback
+# ---------------------------
+# A Wallapop page whose JSON-LD only has the name and price: the description comes from the
+# CONFIG "col_description" meta tag, and the photos from "col_image_http" + "col_image_filter".
+FALLBACK_IMAGES = [
+    "https://cdn.wallapop.com/images/10420/b7/__/c10420p9/i1.jpg?pictureSize=W640",
+    "https://cdn.wallapop.com/images/10420/b7/__/c10420p9/i2.jpg?pictureSize=W640",
+]
+FALLBACK_DESCRIPTION = "Lámpara de pie de los años 70, funciona perfectamente. Recogida en mano en Valencia."
+
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_details_fall_back_to_html(parser):
+    page = _page("wallapop_listing_html", parser)
+    embedded = extract_embedded_listing(page, SPECS["wallapop"], wallapop.CONFIG["col_image_filter"])
+    assert embedded == {"title": "Lámpara de pie vintage", "price": "35,00 €"}
+
+    result = collect_listing_details_http("https://es.wallapop.com/item/lampara-1", "wallapop", wallapop.CONFIG, page=page, embedded=embedded)
+    assert result == ("Lámpara de pie vintage", "35,00 €", FALLBACK_DESCRIPTION)
+    assert extract_images_from_html(page, wallapop.CONFIG["col_image_http"], wallapop.CONFIG["col_image_filter"]) == FALLBACK_IMAGES
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_details_from_html_only(parser):
+    """Without col_json every field comes from the HTML selectors (the title's badge is skipped)."""
+    config = {**wallapop.CONFIG, "col_json": None}
+    page = _page("wallapop_listing_html", parser)
+    result = collect_listing_details_http("https://es.wallapop.com/item/lampara-1", "wallapop", config, page=page, embedded={})
+    assert result == ("Lámpara de pie vintage", "35 €", FALLBACK_DESCRIPTION)
@@ -0,0 +1,96 @@
+import io
+import os
+
+import pytest
+import requests
+from PIL import Image
+from requests.structures import CaseInsensitiveDict
+
+from helpers import images, http_async, http_cache
+from helpers.scraping import collect_listing_images
+from marketplaces import wallapop
+
+
+
+# ---------------------------
+# Listing hash vs profile thumbnail
+# ---------------------------
+# The listing page links a sized variant of the photo (Wallapop ?pictureSize=W640, Milanuncios
+# ?rule=detail_640x480) while the profile grid shows another one. Both sides are hashed from
+# the query-stripped URL, so an exact md5 match still finds the listing.
+BASE = "https://cdn.wallapop.com/images/10420/a1/__/c10420p1/i1.jpg"
+
+
+def _jpeg(color: str, size=(64, 48)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return buf.getvalue()
+
+@pytest.fixture
+def cdn(monkeypatch, tmp_path):
+    """Serve image URLs from a dict instead of the network; records every URL fetched."""
+    bodies, fetched = {}, []
+
+    def _stream_chunks(url):
+        fetched.append(url)
+        if url not in bodies:
+            raise ValueError("404")
+        yield bodies[url]
+
+    monkeypatch.setattr(images, "_stream_chunks", _stream_chunks)
+    monkeypatch.setattr(images, "SCRIPT_DIR", str(tmp_path))  # temp_images/ under tmp_path
+    monkeypatch.setattr(images, "_IMAGE_HASH_CACHE", {})
+    monkeypatch.setattr(http_async, "USE_ASYNC_HTTP", False)
+    return bodies, fetched
+
+
+def test_listing_hash_matches_profile_thumbnail(cdn):
+    bodies, fetched = cdn
+    bodies[BASE] = _jpeg("red")
+    bodies[f"{BASE}?pictureSize=W640"] = _jpeg("red", (640, 480))  # different bytes, same photo
+
+    result = collect_listing_images(BASE, "wallapop", wallapop.CONFIG, embedded={"images": [f"{BASE}?pictureSize=W640"]})
+    assert result is not None
+    images_local, md5, phash = result
+    assert len(images_local) == 1
+
+    thumb_md5, thumb_phash = images.compute_image_hashes(f"{BASE}?pictureSize=W320")
+    assert md5 is not None and md5 == thumb_md5
+    assert phash == thumb_phash
+
+def test_listing_hash_reuses_download_without_query(cdn):
+    bodies, fetched = cdn
+    bodies[BASE] = _jpeg("blue")
+
+    _, md5, _ = collect_listing_images(BASE, "wallapop", wallapop.CONFIG, embedded={"images": [BASE]})
+    assert md5 == images.compute_image_hashes(BASE)[0]
+    assert fetched == [BASE]  # hashed from the bytes just written, no second request
+
+
+# ---------------------------
+# Bodies that are not images
+# ---------------------------
+# CDNs may send photos as application/octet-stream, so the Content-Type alone proves nothing:
+# the body must start with an image file signature before it is written or hashed.
+def _response(body: bytes, content_type: str) -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r.headers = CaseInsensitiveDict({"Content-Type": content_type, "Content-Length": str(len(body))})
+    r.raw = io.BytesIO(body)
+    return r
+
+def test_octet_stream_needs_an_image_signature(monkeypatch, tmp_path):
+    bodies = {f"{BASE}?n=1": _jpeg("green"), f"{BASE}?n=2": b"PK\x03\x04" + b"\x00" * 600}
+    monkeypatch.setattr(http_cache, "get", lambda url, kind, stream=False: _response(bodies[url], "application/octet-stream"))
+    monkeypatch.setattr(images, "SCRIPT_DIR", str(tmp_path))
+    monkeypatch.setattr(http_async, "USE_ASYNC_HTTP", False)
+
+    photo, junk = images.ingest_images(list(bodies))
+    assert photo is not None and photo["phash"] is not None
+    assert junk is None
+    assert not os.path.exists(images.image_path(f"{BASE}?n=2"))
+
+def test_captured_body_needs_an_image_signature(monkeypatch, tmp_path):
+    monkeypatch.setattr(images, "SCRIPT_DIR", str(tmp_path))
+    assert images.ingest_image(BASE, b"<html>Access denied</html>") is None
+    assert not os.path.exists(images.image_path(BASE))